@@ -1,10 +1,18 @@
 from __future__ import annotations
 
 import base64
+import hashlib
 import io as python_io
 import json
 import logging
-from typing import Any, Dict, List, Optional, Tuple
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
 
 import cv2
 import numpy as np
@@ -14,8 +22,50 @@ from comfy_api.latest import ComfyExtension, io
 from typing_extensions import override
 
 
+# Camera near plane distance; 3D layers entirely nearer than this are culled
+_NEAR_PLANE = 0.1
+
+
 class Transform3D:
-    """3D transformation matrix builder for AE-style layer transforms."""
+    """
+    3D transformation matrix builder for AE-style layer transforms.
+    The ``*_batch`` variants take arrays of parameters (any broadcastable shape, e.g. frames x layers)
+    and return stacked results; the scalar methods are the single-element case.
+    """
+
+    @staticmethod
+    def _axis_rotation(deg: Any, axis: int) -> np.ndarray:
+        """Stacked 3x3 rotations by ``deg`` degrees about X (0), Y (1) or Z (2): shape ``deg.shape + (3, 3)``."""
+        rad = np.deg2rad(np.asarray(deg, dtype=np.float64))
+        c, s = np.cos(rad), np.sin(rad)
+        i, j = ((1, 2), (2, 0), (0, 1))[axis]
+        R = np.zeros(rad.shape + (3, 3))
+        R[..., axis, axis] = 1.0
+        R[..., i, i], R[..., i, j] = c, -s
+        R[..., j, i], R[..., j, j] = s, c
+        return R
+
+    @staticmethod
+    def build_model_matrix_batch(
+        x: Any, y: Any, z: Any,
+        rot_x: Any, rot_y: Any, rot_z: Any,
+        scale_x: Any, scale_y: Any, scale_z: Any,
+        anchor_x: Any, anchor_y: Any
+    ) -> np.ndarray:
+        """Stacked model matrices (see ``build_model_matrix``): shape ``broadcast(params) + (4, 4)``."""
+        x, y, z, rot_x, rot_y, rot_z, scale_x, scale_y, scale_z, anchor_x, anchor_y = np.broadcast_arrays(*(
+            np.asarray(v, dtype=np.float64)
+            for v in (x, y, z, rot_x, rot_y, rot_z, scale_x, scale_y, scale_z, anchor_x, anchor_y)
+        ))
+        # T * A_inv * Rx * Ry * Rz * S * A, expanded: p -> R S (p - a) + a + t
+        R = Transform3D._axis_rotation(rot_x, 0) @ Transform3D._axis_rotation(rot_y, 1) @ Transform3D._axis_rotation(rot_z, 2)
+        RS = R * np.stack([scale_x, scale_y, scale_z], axis=-1)[..., None, :]
+        anchor = np.stack([anchor_x, anchor_y, np.zeros_like(anchor_x)], axis=-1)
+        M = np.zeros(x.shape + (4, 4))
+        M[..., :3, :3] = RS
+        M[..., :3, 3] = np.stack([x, y, z], axis=-1) + anchor - (RS @ anchor[..., None])[..., 0]
+        M[..., 3, 3] = 1.0
+        return M
 
     @staticmethod
     def build_model_matrix(
@@ -28,32 +78,21 @@ class Transform3D:
         Build 4x4 model matrix: Anchor offset → Scale → Rotate → Translate
         Rotation order: Z → Y → X (same as AE)
         """
-        # Convert degrees to radians
-        rx, ry, rz = np.deg2rad(rot_x), np.deg2rad(rot_y), np.deg2rad(rot_z)
-        cx, sx = np.cos(rx), np.sin(rx)
-        cy, sy = np.cos(ry), np.sin(ry)
-        cz, sz = np.cos(rz), np.sin(rz)
-
-        # Rotation matrices
-        Rx = np.array([[1, 0, 0, 0], [0, cx, -sx, 0], [0, sx, cx, 0], [0, 0, 0, 1]])
-        Ry = np.array([[cy, 0, sy, 0], [0, 1, 0, 0], [-sy, 0, cy, 0], [0, 0, 0, 1]])
-        Rz = np.array([[cz, -sz, 0, 0], [sz, cz, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]])
-
-        # Scale matrix
-        S = np.diag([scale_x, scale_y, scale_z, 1.0])
+        return Transform3D.build_model_matrix_batch(x, y, z, rot_x, rot_y, rot_z, scale_x, scale_y, scale_z, anchor_x, anchor_y)
 
-        # Translation matrix
-        T = np.eye(4)
-        T[0, 3], T[1, 3], T[2, 3] = x, y, z
-
-        # Anchor offset matrices
-        A = np.eye(4)
-        A[0, 3], A[1, 3] = -anchor_x, -anchor_y
-        A_inv = np.eye(4)
-        A_inv[0, 3], A_inv[1, 3] = anchor_x, anchor_y
-
-        # Combined: T * A_inv * Rx * Ry * Rz * S * A
-        return T @ A_inv @ Rx @ Ry @ Rz @ S @ A
+    @staticmethod
+    def build_view_matrix_batch(cam_x: Any, cam_y: Any, cam_z: Any, yaw: Any, pitch: Any, roll: Any) -> np.ndarray:
+        """Stacked view matrices (see ``build_view_matrix``): shape ``broadcast(params) + (4, 4)``."""
+        cam_x, cam_y, cam_z, yaw, pitch, roll = np.broadcast_arrays(*(
+            np.asarray(v, dtype=np.float64) for v in (cam_x, cam_y, cam_z, yaw, pitch, roll)
+        ))
+        # Inverse rotation (transpose): Rz_inv * Rx_inv * Ry_inv, then the inverse translation
+        R_inv = Transform3D._axis_rotation(-roll, 2) @ Transform3D._axis_rotation(-pitch, 0) @ Transform3D._axis_rotation(-yaw, 1)
+        V = np.zeros(yaw.shape + (4, 4))
+        V[..., :3, :3] = R_inv
+        V[..., :3, 3] = -(R_inv @ np.stack([cam_x, cam_y, cam_z], axis=-1)[..., None])[..., 0]
+        V[..., 3, 3] = 1.0
+        return V
 
     @staticmethod
     def build_view_matrix(
@@ -64,79 +103,766 @@ class Transform3D:
         Build 4x4 view matrix from camera position and rotation.
         View matrix is inverse of camera's world transform.
         """
-        ry, rp, rr = np.deg2rad(yaw), np.deg2rad(pitch), np.deg2rad(roll)
-        cy, sy = np.cos(ry), np.sin(ry)
-        cp, sp = np.cos(rp), np.sin(rp)
-        cr, sr = np.cos(rr), np.sin(rr)
+        return Transform3D.build_view_matrix_batch(cam_x, cam_y, cam_z, yaw, pitch, roll)
 
-        # Inverse rotation (transpose)
-        Ry_inv = np.array([[cy, 0, -sy, 0], [0, 1, 0, 0], [sy, 0, cy, 0], [0, 0, 0, 1]])
-        Rx_inv = np.array([[1, 0, 0, 0], [0, cp, sp, 0], [0, -sp, cp, 0], [0, 0, 0, 1]])
-        Rz_inv = np.array([[cr, sr, 0, 0], [-sr, cr, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]])
-
-        # Inverse translation
-        T_inv = np.eye(4)
-        T_inv[0, 3], T_inv[1, 3], T_inv[2, 3] = -cam_x, -cam_y, -cam_z
+    @staticmethod
+    def build_projection_matrix_batch(fov_deg: Any, aspect: Any, near: float = _NEAR_PLANE, far: float = 10000.0) -> np.ndarray:
+        """Stacked projection matrices (see ``build_projection_matrix``): shape ``broadcast(fov_deg, aspect) + (4, 4)``."""
+        fov_deg, aspect = np.broadcast_arrays(np.asarray(fov_deg, dtype=np.float64), np.asarray(aspect, dtype=np.float64))
+        fov = np.deg2rad(np.clip(fov_deg, 1.0, 179.0))
+        f = 1.0 / np.tan(fov / 2)
+        nf = 1.0 / (near - far)
 
-        # View = R_inv * T_inv (rotate first, then translate)
-        return Rz_inv @ Rx_inv @ Ry_inv @ T_inv
+        P = np.zeros(f.shape + (4, 4))
+        P[..., 0, 0] = f / aspect
+        P[..., 1, 1] = f
+        P[..., 2, 2] = (far + near) * nf
+        P[..., 2, 3] = 2 * far * near * nf
+        P[..., 3, 2] = -1.0
+        return P
 
     @staticmethod
-    def build_projection_matrix(fov_deg: float, aspect: float, near: float = 0.1, far: float = 10000.0) -> np.ndarray:
+    def build_projection_matrix(fov_deg: float, aspect: float, near: float = _NEAR_PLANE, far: float = 10000.0) -> np.ndarray:
         """
         Build 4x4 perspective projection matrix.
         FOV is vertical field of view in degrees.
         """
-        fov = np.deg2rad(max(1.0, min(179.0, fov_deg)))
-        f = 1.0 / np.tan(fov / 2)
-        nf = 1.0 / (near - far)
-
-        return np.array([
-            [f / aspect, 0, 0, 0],
-            [0, f, 0, 0],
-            [0, 0, (far + near) * nf, 2 * far * near * nf],
-            [0, 0, -1, 0]
-        ])
+        return Transform3D.build_projection_matrix_batch(fov_deg, aspect, near, far)
 
     @staticmethod
-    def project_corners(img_w: int, img_h: int, mvp: np.ndarray, screen_w: int, screen_h: int) -> np.ndarray:
-        """
-        Project image corners through MVP matrix to get 2D screen coordinates.
-        Returns 4x2 array of corner positions: [top-left, top-right, bottom-right, bottom-left]
-        """
-        hw, hh = img_w / 2, img_h / 2
+    def project_corners_batch(img_w: Any, img_h: Any, mvp: np.ndarray, screen_w: int, screen_h: int) -> np.ndarray:
+        """Stacked ``project_corners``: ``mvp`` of shape ``S + (4, 4)`` (image sizes broadcast to ``S``) -> ``S + (4, 2)``."""
+        mvp = np.asarray(mvp, dtype=np.float64)
+        hw = np.broadcast_to(np.asarray(img_w, dtype=np.float64) / 2, mvp.shape[:-2])
+        hh = np.broadcast_to(np.asarray(img_h, dtype=np.float64) / 2, mvp.shape[:-2])
         # 使用标准3D坐标系（Y向上）
         # top = -hh (在屏幕上方), bottom = +hh (在屏幕下方)
-        corners = np.array([
-            [-hw, -hh, 0, 1],  # top-left
-            [hw, -hh, 0, 1],   # top-right
-            [hw, hh, 0, 1],    # bottom-right
-            [-hw, hh, 0, 1],   # bottom-left
-        ])
-
-        projected = (mvp @ corners.T).T
+        # 顺序: top-left, top-right, bottom-right, bottom-left
+        corners = np.stack([
+            np.stack([-hw, hw, hw, -hw], axis=-1),
+            np.stack([-hh, -hh, hh, hh], axis=-1),
+            np.zeros(hw.shape + (4,)),
+            np.ones(hw.shape + (4,)),
+        ], axis=-2)
+
+        projected = mvp @ corners
         # Perspective divide
-        w = projected[:, 3:4]
+        w = projected[..., 3, :]
         w = np.where(np.abs(w) < 1e-6, 1e-6, w)
-        ndc = projected[:, :2] / w
 
         # NDC to screen coordinates
         # 标准NDC: Y向上，范围[-1,1]
         # 屏幕坐标: Y向下，范围[0,height]
-        screen = np.zeros((4, 2))
-        screen[:, 0] = (ndc[:, 0] + 1) * 0.5 * screen_w
-        screen[:, 1] = (1 - ndc[:, 1]) * 0.5 * screen_h  # Flip Y for screen coords
+        screen = np.empty(hw.shape + (4, 2))
+        screen[..., 0] = (projected[..., 0, :] / w + 1) * 0.5 * screen_w
+        screen[..., 1] = (1 - projected[..., 1, :] / w) * 0.5 * screen_h  # Flip Y for screen coords
         return screen.astype(np.float32)
 
+    @staticmethod
+    def project_corners(img_w: int, img_h: int, mvp: np.ndarray, screen_w: int, screen_h: int) -> np.ndarray:
+        """
+        Project image corners through MVP matrix to get 2D screen coordinates.
+        Returns 4x2 array of corner positions: [top-left, top-right, bottom-right, bottom-left]
+        """
+        return Transform3D.project_corners_batch(img_w, img_h, mvp, screen_w, screen_h)
+
+    @staticmethod
+    def get_layer_z_depth_batch(x: Any, y: Any, z: Any, view_matrix: np.ndarray) -> np.ndarray:
+        """Stacked ``get_layer_z_depth``: ``view_matrix`` of shape ``S + (4, 4)`` broadcasts against the positions."""
+        view_row = np.asarray(view_matrix, dtype=np.float64)[..., 2, :]
+        return view_row[..., 0] * x + view_row[..., 1] * y + view_row[..., 2] * z + view_row[..., 3]
+
     @staticmethod
     def get_layer_z_depth(
         x: float, y: float, z: float,
         view_matrix: np.ndarray
     ) -> float:
         """Get the Z depth of a layer center after view transform (for sorting)."""
-        point = np.array([x, y, z, 1])
-        transformed = view_matrix @ point
-        return transformed[2]
+        return float(Transform3D.get_layer_z_depth_batch(x, y, z, view_matrix))
+
+
+class KeyframeTrack:
+    """A property's keyframes compiled into sorted time/value arrays for batched evaluation."""
+
+    __slots__ = ("times", "values")
+
+    def __init__(self, times: np.ndarray, values: np.ndarray) -> None:
+        self.times = times
+        self.values = values
+
+    @classmethod
+    def compile(cls, frames_data: Any) -> Optional["KeyframeTrack"]:
+        """Build a track from a raw keyframe list; returns None when there is nothing to animate."""
+        if not isinstance(frames_data, list):
+            return None
+        keys = []
+        for f in frames_data:
+            if not (isinstance(f, dict) and "time" in f and "value" in f):
+                continue
+            try:
+                keys.append((float(f["time"]), float(f["value"])))
+            except (TypeError, ValueError):
+                continue
+        if not keys:
+            return None
+        # Stable sort keeps the original order of keys sharing a time
+        keys.sort(key=lambda k: k[0])
+        arr = np.array(keys, dtype=np.float64)
+        return cls(np.ascontiguousarray(arr[:, 0]), np.ascontiguousarray(arr[:, 1]))
+
+    def evaluate(self, t: np.ndarray) -> np.ndarray:
+        """
+        Linearly interpolate at every time in ``t``.
+        Values are held before the first and after the last keyframe.
+        """
+        t = np.asarray(t, dtype=np.float64)
+        times, values = self.times, self.values
+        if len(times) == 1:
+            return np.full(t.shape, values[0])
+        # First key at or after t closes the segment (matches the legacy linear scan)
+        j = np.clip(np.searchsorted(times, t, side="left"), 1, len(times) - 1)
+        t0, t1 = times[j - 1], times[j]
+        v0, v1 = values[j - 1], values[j]
+        duration = t1 - t0
+        frac = np.divide(t - t0, duration, out=np.zeros_like(t), where=duration > 0)
+        out = v0 + (v1 - v0) * frac
+        out = np.where(t <= times[0], values[0], out)
+        return np.where(t >= times[-1], values[-1], out)
+
+
+# Layer properties that can be keyframed, evaluated for every frame in one batch
+_LAYER_ANIMATED_PROPS = (
+    "x", "y", "z",
+    "rotationX", "rotationY", "rotationZ",
+    "scaleX", "scaleY", "scaleZ",
+    "anchorX", "anchorY",
+    "opacity", "scale", "rotation",
+)
+
+def _evaluate_tracks(keyframes: Any, defaults: Dict[str, Any], times: np.ndarray) -> Dict[str, List[Any]]:
+    """Evaluate each property in ``defaults`` at all ``times``; un-keyframed properties repeat their default."""
+    if not isinstance(keyframes, dict):
+        keyframes = {}
+    n = len(times)
+    values: Dict[str, List[Any]] = {}
+    for prop, default in defaults.items():
+        track = KeyframeTrack.compile(keyframes.get(prop))
+        values[prop] = track.evaluate(times).tolist() if track is not None else [default] * n
+    return values
+
+
+class BezierPath:
+    """
+    A layer's ``bezierPath`` compiled into per-segment cubic control points plus a dense arc-length
+    table, so positions for every frame come from one vectorized lookup whatever the point count.
+    """
+
+    __slots__ = ("segments", "arc_params", "arc_lengths")
+
+    # Chord samples per segment for the arc-length table
+    SAMPLES_PER_SEGMENT = 64
+
+    def __init__(self, segments: np.ndarray) -> None:
+        self.segments = segments
+        n = len(segments)
+        u = np.linspace(0.0, n, n * self.SAMPLES_PER_SEGMENT + 1)
+        x, y = self._at(u)
+        self.arc_params = u
+        self.arc_lengths = np.concatenate(([0.0], np.cumsum(np.hypot(np.diff(x), np.diff(y)))))
+
+    @classmethod
+    def compile(cls, path_points: Any) -> Optional["BezierPath"]:
+        """Build from a raw point list (missing handles default to thirds of the chord); None below two points."""
+        if not isinstance(path_points, list) or len(path_points) < 2:
+            return None
+        segments = np.empty((len(path_points) - 1, 4, 2), dtype=np.float64)
+        for k, (p0, p1) in enumerate(zip(path_points[:-1], path_points[1:])):
+            p0_x, p0_y = p0.get("x", 0), p0.get("y", 0)
+            p1_x, p1_y = p1.get("x", 0), p1.get("y", 0)
+            segments[k] = (
+                (p0_x, p0_y),
+                (p0.get("cp2x", p0_x + (p1_x - p0_x) / 3.0), p0.get("cp2y", p0_y + (p1_y - p0_y) / 3.0)),
+                (p1.get("cp1x", p0_x + (p1_x - p0_x) * 2.0 / 3.0), p1.get("cp1y", p0_y + (p1_y - p0_y) * 2.0 / 3.0)),
+                (p1_x, p1_y),
+            )
+        return cls(segments)
+
+    def _at(self, u: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Points at global parameters ``u`` in [0, n_segments] (integer part picks the segment)."""
+        n = len(self.segments)
+        k = np.minimum(u.astype(np.int64), n - 1)
+        t = u - k
+        mt = 1 - t
+        c = self.segments[k]
+        x = mt**3 * c[:, 0, 0] + 3 * mt**2 * t * c[:, 1, 0] + 3 * mt * t**2 * c[:, 2, 0] + t**3 * c[:, 3, 0]
+        y = mt**3 * c[:, 0, 1] + 3 * mt**2 * t * c[:, 1, 1] + 3 * mt * t**2 * c[:, 2, 1] + t**3 * c[:, 3, 1]
+        return x, y
+
+    def evaluate(self, t_norm: np.ndarray, constant_speed: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Positions at normalized times ``t_norm`` in [0, 1]. Constant speed maps time to distance along
+        the path; otherwise each segment gets an equal share of time (legacy timing, as the preview).
+        """
+        u = np.asarray(t_norm, dtype=np.float64) * len(self.segments)
+        if constant_speed and self.arc_lengths[-1] > 0:
+            u = np.interp(u / len(self.segments) * self.arc_lengths[-1], self.arc_lengths, self.arc_params)
+        return self._at(u)
+
+
+class DecodedImageCache:
+    """
+    Process-wide LRU cache of decoded RGBA images, keyed by a hash of their base64 payload.
+    Cached arrays are read-only and shared by every layer that embeds the same image.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max(0, int(max_bytes))
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "DecodedImageCache":
+        """Budget in MB from AE_ANIMATION_IMAGE_CACHE_MB (0 disables caching across executions)."""
+        try:
+            budget_mb = float(os.environ.get("AE_ANIMATION_IMAGE_CACHE_MB", 1024))
+        except ValueError:
+            budget_mb = 1024
+        return cls(int(budget_mb * 1024 * 1024))
+
+    @staticmethod
+    def key_for(payload: str) -> str:
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            arr = self._entries.get(key)
+            if arr is not None:
+                self._entries.move_to_end(key)
+            return arr
+
+    def put(self, key: str, arr: np.ndarray) -> np.ndarray:
+        """Insert ``arr`` (made read-only) and return the cached buffer for ``key``."""
+        arr.flags.writeable = False
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing is not None:
+                self._entries.move_to_end(key)
+                return existing
+            if arr.nbytes > self.max_bytes:
+                return arr
+            self._entries[key] = arr
+            self._nbytes += arr.nbytes
+            self._evict()
+        return arr
+
+    def set_budget(self, max_bytes: int) -> None:
+        with self._lock:
+            self.max_bytes = max(0, int(max_bytes))
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def _evict(self) -> None:
+        while self._entries and self._nbytes > self.max_bytes:
+            _, old = self._entries.popitem(last=False)
+            self._nbytes -= old.nbytes
+
+    def decode(self, payload: str) -> Tuple[str, np.ndarray]:
+        """Return ``(content_key, rgba)`` for a base64 PNG/JPEG payload, decoding only on a miss."""
+        key = self.key_for(payload)
+        arr = self.get(key)
+        if arr is None:
+            pil = Image.open(python_io.BytesIO(base64.b64decode(payload))).convert("RGBA")
+            arr = self.put(key, np.array(pil))
+        return key, arr
+
+
+_image_cache = DecodedImageCache.from_env()
+
+
+class MipPyramid:
+    """
+    Lazily built mipmap chain of a read-only layer sprite: level k is the sprite box-filtered to
+    about 1/2^k of its size. Levels are built on first use (once, under a lock) and shared by every
+    thread; render paths resize or warp from the level closest to the on-screen size instead of
+    from the full-resolution source.
+    """
+
+    def __init__(self, base: np.ndarray) -> None:
+        self._levels = [base]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._levels)
+
+    def level(self, k: int) -> np.ndarray:
+        """Level ``k``, clamped to the 1x1 end of the chain."""
+        if k < len(self._levels):
+            return self._levels[k]
+        with self._lock:
+            while len(self._levels) <= k:
+                prev = self._levels[-1]
+                h, w = prev.shape[:2]
+                if w == 1 and h == 1:
+                    break
+                nxt = cv2.resize(prev, ((w + 1) // 2, (h + 1) // 2), interpolation=cv2.INTER_AREA)
+                nxt.flags.writeable = False
+                self._levels.append(nxt)
+            return self._levels[min(k, len(self._levels) - 1)]
+
+    def for_scale(self, scale: float) -> np.ndarray:
+        """
+        Smallest level still at least ``scale`` times the base size, so the final resize or warp
+        never minifies by 2x or more. Scales of 0.5 and above (and invalid ones) use the base.
+        """
+        if not 0 < scale < 0.5:
+            return self._levels[0]
+        return self.level(int(np.floor(np.log2(1.0 / scale))))
+
+
+def _input_directory() -> str:
+    """ComfyUI's input directory (``./input`` when running outside ComfyUI)."""
+    try:
+        import folder_paths
+    except ImportError:
+        return os.path.abspath("input")
+    return folder_paths.get_input_directory()
+
+
+class ImageAssetStore:
+    """
+    Content-addressed store of decoded layer images under ``<input>/ae_animation_assets``.
+    Each asset is an RGBA ``.npy`` named by the hash of the encoded image it was made from, so a
+    layer referencing ``asset:<hash>`` loads as a read-only memory map with no PNG decode.
+    """
+
+    PREFIX = "asset:"
+
+    def __init__(self, root: Optional[str] = None) -> None:
+        self._root = root
+
+    @property
+    def root(self) -> str:
+        return self._root or os.path.join(_input_directory(), "ae_animation_assets")
+
+    def path_for(self, key: str) -> str:
+        if len(key) != 32 or any(c not in "0123456789abcdef" for c in key):
+            raise ValueError(f"invalid asset key: {key!r}")
+        return os.path.join(self.root, key + ".npy")
+
+    def put(self, data: bytes) -> str:
+        """Decode an encoded image (PNG/JPEG/...) into the store and return its ``asset:<hash>`` reference."""
+        key = hashlib.blake2b(data, digest_size=16).hexdigest()
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            rgba = np.array(Image.open(python_io.BytesIO(data)).convert("RGBA"))
+            os.makedirs(self.root, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, rgba)
+            os.replace(tmp, path)
+        return self.PREFIX + key
+
+    def load(self, key: str) -> np.ndarray:
+        return np.load(self.path_for(key), mmap_mode="r")
+
+
+_asset_store = ImageAssetStore()
+
+
+def _resolve_input_path(ref: str) -> str:
+    """
+    Absolute path of an image in the input directory, given as a relative path or a
+    ``/view?filename=...&subfolder=...&type=input`` URL; paths escaping the directory are rejected.
+    """
+    root = os.path.realpath(_input_directory())
+    if ref.startswith(("/view?", "/api/view?")):
+        query = parse_qs(urlsplit(ref).query)
+        if query.get("type", ["input"])[0] != "input":
+            raise ValueError(f"only input images can be referenced: {ref}")
+        ref = os.path.join(query.get("subfolder", [""])[0], query["filename"][0])
+    path = os.path.realpath(os.path.join(root, ref))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"image path is outside the input directory: {ref}")
+    return path
+
+
+def _load_image(value: str) -> Tuple[str, np.ndarray]:
+    """
+    Resolve a layer ``image_data``/``customMask`` value to ``(content_key, rgba)``: an inline base64
+    data URL (legacy), an ``asset:<hash>`` reference, or an input-directory file. Files are decoded
+    through the image cache, keyed by path, size and mtime so edits on disk are picked up.
+    """
+    if value.startswith("data:"):
+        return _image_cache.decode(value.split(",", 1)[1])
+    if value.startswith(ImageAssetStore.PREFIX):
+        key = value[len(ImageAssetStore.PREFIX):]
+        return key, _asset_store.load(key)
+    path = _resolve_input_path(value)
+    stat = os.stat(path)
+    key = DecodedImageCache.key_for(f"{path}:{stat.st_size}:{stat.st_mtime_ns}")
+    arr = _image_cache.get(key)
+    if arr is None:
+        with Image.open(path) as pil:
+            arr = _image_cache.put(key, np.array(pil.convert("RGBA")))
+    return key, arr
+
+
+# Bump when a render change alters pixels, so stale frame cache entries stop matching
+_FRAME_CACHE_VERSION = 1
+
+# Draft (proxy) render resolutions: internal canvas divisor per ``draft_resolution`` option
+_DRAFT_DIVISORS = {"full": 1, "1/2": 2, "1/4": 4, "1/8": 8}
+
+
+class FrameCache:
+    """
+    Disk-backed LRU of finished frames, keyed by a hash of everything a frame depends on.
+    Each entry is one ``.npy`` holding the frame's uint8 RGB plus its mask as a fourth channel; an
+    entry's mtime is its recency (refreshed on every hit) and the oldest go first past the size cap.
+    """
+
+    def __init__(self, root: str, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = max(0, int(max_bytes))
+        self._index: Optional["OrderedDict[str, int]"] = None
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "FrameCache":
+        """Directory from AE_ANIMATION_FRAME_CACHE_DIR, size cap in MB from AE_ANIMATION_FRAME_CACHE_MB (default 4096)."""
+        root = os.environ.get("AE_ANIMATION_FRAME_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "ae_animation", "frames")
+        try:
+            budget_mb = float(os.environ.get("AE_ANIMATION_FRAME_CACHE_MB", 4096))
+        except ValueError:
+            budget_mb = 4096
+        return cls(root, int(budget_mb * 1024 * 1024))
+
+    @property
+    def nbytes(self) -> int:
+        with self._lock:
+            self._entries()
+            return self._nbytes
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key + ".npy")
+
+    def _entries(self) -> "OrderedDict[str, int]":
+        """Entry sizes, least recently used first; scanned from disk once per process (lock held)."""
+        if self._index is None:
+            found = []
+            try:
+                with os.scandir(self.root) as it:
+                    for entry in it:
+                        if entry.name.endswith(".npy"):
+                            stat = entry.stat()
+                            found.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+            except FileNotFoundError:
+                pass
+            found.sort()
+            self._index = OrderedDict((key, size) for _, key, size in found)
+            self._nbytes = sum(self._index.values())
+        return self._index
+
+    def get(self, key: str, frame_out: np.ndarray, mask_out: np.ndarray) -> bool:
+        """Fill a frame's float outputs from the entry for ``key``; False on a miss."""
+        path = self._path(key)
+        try:
+            packed = np.load(path, mmap_mode="r")
+            if packed.shape != frame_out.shape[:2] + (4,) or packed.dtype != np.uint8:
+                return False
+            np.divide(packed[:, :, :3], np.float32(255.0), out=frame_out, dtype=np.float32)
+            np.divide(packed[:, :, 3], np.float32(255.0), out=mask_out, dtype=np.float32)
+            del packed
+            os.utime(path)
+        except (OSError, ValueError):
+            return False
+        with self._lock:
+            entries = self._entries()
+            if key in entries:
+                entries.move_to_end(key)
+        return True
+
+    def put(self, key: str, frame: np.ndarray, mask: np.ndarray) -> None:
+        """Store a rendered frame; outputs are exact multiples of 1/255, so uint8 round-trips losslessly."""
+        if self.max_bytes <= 0:
+            return
+        packed = np.empty(frame.shape[:2] + (4,), dtype=np.uint8)
+        packed[:, :, :3] = np.rint(frame * np.float32(255.0))
+        packed[:, :, 3] = np.rint(mask * np.float32(255.0))
+        path = self._path(key)
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, packed)
+            size = os.path.getsize(tmp)
+            os.replace(tmp, path)
+        except OSError as e:
+            logging.warning(f"[AE] Frame cache write error: {e}")
+            return
+        with self._lock:
+            entries = self._entries()
+            self._nbytes += size - entries.pop(key, 0)
+            entries[key] = size
+            while entries and self._nbytes > self.max_bytes:
+                old, old_size = entries.popitem(last=False)
+                self._nbytes -= old_size
+                try:
+                    os.remove(self._path(old))
+                except OSError:
+                    pass
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in self._entries():
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+            self._index = OrderedDict()
+            self._nbytes = 0
+
+
+_frame_cache = FrameCache.from_env()
+
+
+@lru_cache(maxsize=1024)
+def _opacity_luts(opacity: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per-alpha lookup tables for one layer opacity: blend weight (Q15), canvas alpha, mask value."""
+    alpha = (np.arange(256, dtype=np.float32) / 255.0) * opacity
+    weight = np.round(alpha * 32767).astype(np.int16)
+    canvas_alpha = (alpha * 255).astype(np.uint8)
+    mask = (np.arange(256, dtype=np.float32) * opacity).astype(np.uint8)
+    return weight, canvas_alpha, mask
+
+
+# Motion blur takes one sub-frame sample per pixel of on-screen travel during the shutter (up to the cap)
+_MOTION_BLUR_PX_PER_SAMPLE = 1.0
+
+# Remap tables kept per scene; 8 views at 1080p are ~130 MB, and the byte budget caps 4K/8K frames.
+# Tiled renders cache per-tile tables under a fixed budget instead: a still camera keeps every tile of
+# a 4K frame, and larger frames rebuild tables per tile rather than grow the cache
+_PANO_MAP_CACHE_ENTRIES = 8
+_PANO_MAP_CACHE_BYTES = 1 << 30
+_PANO_TILE_MAP_CACHE_BYTES = 128 << 20
+
+
+@lru_cache(maxsize=4)
+def _pano_rays(dst_w: int, dst_h: int, fov_deg: float, window: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+    """
+    Unit camera-space view rays (H, W, 3) float32 for one output size and field of view, or for
+    only the pixels of ``window = (x0, y0, x1, y1)`` (same values as the matching full-frame slice).
+    """
+    x0, y0, x1, y1 = window or (0, 0, dst_w, dst_h)
+    fov = np.deg2rad(fov_deg)
+    aspect = dst_w / max(1e-6, dst_h)
+    rays = np.empty((y1 - y0, x1 - x0, 3), dtype=np.float32)
+    rays[..., 0] = ((np.arange(x0, x1, dtype=np.float32) + 0.5) / dst_w * 2 - 1) * np.float32(np.tan(fov / 2) * aspect)
+    rays[..., 1] = (-((np.arange(y0, y1, dtype=np.float32) + 0.5) / dst_h * 2 - 1) * np.float32(np.tan(fov / 2)))[:, None]
+    rays[..., 2] = 1.0
+    rays /= np.linalg.norm(rays, axis=-1, keepdims=True)
+    rays.flags.writeable = False
+    return rays
+
+
+# Mask post-process: above these, expansion/feather switch to the flat-cost paths
+_MASK_MORPH_DIRECT_MAX = 24
+_MASK_FEATHER_EXACT_MAX = 7
+
+
+def _window_extreme(a: np.ndarray, radius: int, axis: int, maximum: bool) -> np.ndarray:
+    """
+    Max (or min) over the window ``[x - radius, x + radius]`` along one axis, out-of-range samples
+    ignored. Windows double per pass (van Herk style without the block bookkeeping): O(log radius).
+    """
+    op, neutral = (np.maximum, 0) if maximum else (np.minimum, 255)
+    k = 2 * radius + 1
+    pad = [(0, 0)] * a.ndim
+    pad[axis] = (radius, radius)
+    cur = np.pad(a, pad, constant_values=neutral)
+    cur = np.moveaxis(cur, axis, 0)
+    n, w = cur.shape[0], 1
+    while 2 * w <= k:
+        cur = op(cur[:n - w], cur[w:n])
+        n -= w
+        w *= 2
+    length = a.shape[axis]
+    return np.moveaxis(op(cur[:length], cur[k - w:k - w + length]), 0, axis)
+
+
+@lru_cache(maxsize=128)
+def _feather_box_sizes(ksize: int) -> Tuple[int, int, int]:
+    """Three odd box widths whose cascade has the variance of cv2's default sigma for ``ksize``."""
+    sigma = 0.3 * ((ksize - 1) * 0.5 - 1) + 0.8
+    lower = int(np.floor(np.sqrt(4 * sigma * sigma + 1)))
+    lower -= lower % 2 == 0
+    n_lower = int(round((12 * sigma * sigma - 3 * lower * lower - 12 * lower - 9) / (-4 * lower - 4)))
+    return tuple(lower if i < n_lower else lower + 2 for i in range(3))
+
+
+class AlphaCompositor:
+    """
+    Fused in-place "over" compositor shared by every render path.
+    Color is blended in Q15 fixed point (within 1 level of the legacy float32 blend, which truncated);
+    canvas alpha and foreground mask use exact lookup tables. Scratch buffers grow to the largest
+    region seen and are reused across layers and frames, so compositing allocates nothing.
+    Not thread-safe: use one instance per thread (see ``for_thread``).
+    """
+
+    _local = threading.local()
+
+    def __init__(self) -> None:
+        self._buffers: Dict[str, np.ndarray] = {}
+        # Seconds spent in composite() on this thread; read by the profiler
+        self.elapsed = 0.0
+
+    @classmethod
+    def for_thread(cls) -> "AlphaCompositor":
+        compositor = getattr(cls._local, "compositor", None)
+        if compositor is None:
+            compositor = cls._local.compositor = cls()
+        return compositor
+
+    def _scratch(self, name: str, shape: Tuple[int, ...], dtype: Any) -> np.ndarray:
+        n = int(np.prod(shape))
+        buf = self._buffers.get(name)
+        if buf is None or buf.size < n:
+            buf = self._buffers[name] = np.empty(n, dtype=dtype)
+        return buf[:n].reshape(shape)
+
+    def composite(
+        self,
+        dst: np.ndarray,
+        mask_dst: Optional[np.ndarray],
+        src: np.ndarray,
+        opacity: float
+    ) -> None:
+        """
+        Blend RGBA ``src`` over the equally sized RGBA canvas region ``dst`` in place, raise the canvas
+        alpha to the layer alpha, and (when ``mask_dst`` is given) raise the mask to alpha * opacity.
+        """
+        h, w = src.shape[:2]
+        if h == 0 or w == 0:
+            return
+        t0 = perf_counter()
+        lut_weight, lut_alpha, lut_mask = _opacity_luts(float(opacity))
+
+        a = cv2.extractChannel(src, 3, dst=self._scratch("a", (h, w), np.uint8))
+        if mask_dst is not None:
+            layer_mask = cv2.LUT(a, lut_mask, dst=self._scratch("u8", (h, w), np.uint8))
+            cv2.max(mask_dst, layer_mask, dst=mask_dst)
+
+        # dst += round((src - dst) * weight); the zero alpha weight leaves canvas alpha for the max below
+        weight = cv2.LUT(a, lut_weight, dst=self._scratch("w", (h, w), np.int16))
+        zero = self._scratch("zero", (h, w), np.int16)
+        zero.fill(0)
+        weight4 = cv2.merge([weight, weight, weight, zero], dst=self._scratch("w4", (h, w, 4), np.int16))
+        diff = cv2.subtract(src, dst, dtype=cv2.CV_16S, dst=self._scratch("d", (h, w, 4), np.int16))
+        cv2.multiply(diff, weight4, dst=diff, scale=1.0 / 32767)
+        cv2.add(dst, diff, dst=dst, dtype=cv2.CV_8U)
+
+        layer_alpha = cv2.LUT(a, lut_alpha, dst=self._scratch("u8", (h, w), np.uint8))
+        canvas_alpha = cv2.extractChannel(dst, 3, dst=self._scratch("ca", (h, w), np.uint8))
+        cv2.max(canvas_alpha, layer_alpha, dst=canvas_alpha)
+        cv2.insertChannel(canvas_alpha, dst, 3)
+        self.elapsed += perf_counter() - t0
+
+
+class RenderProfiler:
+    """
+    Optional per-stage timers for one ``execute`` call.
+    Enabled by ``AE_ANIMATION_PROFILE=1`` or while a callback is registered with ``add_callback``;
+    when disabled every hook is a single attribute check. Stage times are wall seconds summed over
+    render threads, so parallel stages can add up to more than the run's total. ``warp:<path>`` is a
+    layer's render time minus compositing and includes any panorama map built for it (``pano_map``).
+    The summary is logged (totals at INFO, per-layer/per-frame at DEBUG) and passed to callbacks.
+    """
+
+    _callbacks: List[Callable[[Dict[str, Any]], None]] = []
+
+    def __init__(self, enabled: bool) -> None:
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.stages: Dict[str, List[float]] = {}
+        self.layers: Dict[int, Dict[str, float]] = {}
+        self.frames: Dict[int, float] = {}
+
+    @classmethod
+    def for_run(cls) -> "RenderProfiler":
+        flag = os.environ.get("AE_ANIMATION_PROFILE", "").strip().lower()
+        return cls(flag not in ("", "0", "false", "no") or bool(cls._callbacks))
+
+    @classmethod
+    def add_callback(cls, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """Call ``callback(summary)`` after every profiled run (enables profiling while registered)."""
+        cls._callbacks.append(callback)
+
+    @classmethod
+    def remove_callback(cls, callback: Callable[[Dict[str, Any]], None]) -> None:
+        cls._callbacks.remove(callback)
+
+    def add(self, stage: str, seconds: float, layer: Optional[int] = None, frame: Optional[int] = None) -> None:
+        with self._lock:
+            entry = self.stages.setdefault(stage, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+            if layer is not None:
+                per_layer = self.layers.setdefault(layer, {})
+                per_layer[stage] = per_layer.get(stage, 0.0) + seconds
+            if frame is not None:
+                self.frames[frame] = self.frames.get(frame, 0.0) + seconds
+
+    def summary(self, total: float, layers: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """JSON-serializable breakdown; times in milliseconds, frames keyed by absolute frame number."""
+        def ms(seconds: float) -> float:
+            return round(seconds * 1000, 3)
+
+        frame_ms = sorted(self.frames.items(), key=lambda item: item[1], reverse=True)
+        return {
+            "total_ms": ms(total),
+            "stages": {
+                stage: {"total_ms": ms(seconds), "count": count, "mean_ms": ms(seconds / max(count, 1))}
+                for stage, (seconds, count) in sorted(self.stages.items(), key=lambda item: item[1][0], reverse=True)
+            },
+            "layers": [
+                {"index": index, "type": layers[index]["type"], **{stage: ms(s) for stage, s in stages.items()}}
+                for index, stages in sorted(self.layers.items())
+            ],
+            "frames": {str(frame): ms(seconds) for frame, seconds in sorted(self.frames.items())},
+            "slowest_frames": [[frame, ms(seconds)] for frame, seconds in frame_ms[:5]],
+        }
+
+    def report(self, total: float, layers: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Log the summary and hand it to registered callbacks."""
+        if not self.enabled:
+            return None
+        summary = self.summary(total, layers)
+        stages = ", ".join(f"{stage} {entry['total_ms']:.1f}" for stage, entry in summary["stages"].items())
+        logging.info(f"[AE] Profile: total {summary['total_ms']:.1f} ms; {stages}")
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            for entry in summary["layers"]:
+                logging.debug(f"[AE] Profile layer: {json.dumps(entry)}")
+            for frame, frame_ms in summary["frames"].items():
+                logging.debug(f"[AE] Profile frame {frame}: {frame_ms:.2f} ms")
+        for callback in list(self._callbacks):
+            try:
+                callback(summary)
+            except Exception as e:
+                logging.warning(f"[AE] Profile callback failed: {e}")
+        return summary
 
 
 def _parse_layers(layers_json: str) -> Dict[str, Any]:
@@ -191,6 +917,16 @@ class AEAnimation(io.ComfyNode):
                 io.String.Input("layers_keyframes", default="[]", multiline=True),
                 io.Int.Input("start_frame", default=0, min=0),
                 io.Int.Input("end_frame", default=-1, min=-1),
+                io.Int.Input("render_threads", default=0, min=0, max=256, optional=True),
+                io.Int.Input("render_tile_size", default=0, min=0, max=8192, optional=True),
+                io.Int.Input("frame_cache", default=0, min=0, max=1, optional=True),
+                io.Combo.Input("path_timing", options=["uniform_segments", "constant_speed"], default="uniform_segments", optional=True),
+                io.Float.Input("motion_blur", default=0.0, min=0.0, max=720.0, optional=True),
+                io.Int.Input("motion_blur_samples", default=16, min=2, max=64, optional=True),
+                io.Int.Input("mipmaps", default=0, min=0, max=1, optional=True),
+                io.Combo.Input("layer_warp", options=["legacy", "fused"], default="legacy", optional=True),
+                io.Combo.Input("draft_resolution", options=list(_DRAFT_DIVISORS), default="full", optional=True),
+                io.Int.Input("draft_frame_step", default=1, min=1, max=64, optional=True),
             ],
             outputs=[
                 io.Image.Output("frames"),
@@ -200,63 +936,22 @@ class AEAnimation(io.ComfyNode):
         schema.output_node = True
         return schema
 
-    @staticmethod
-    def _get_value(keyframes: Dict[str, Any], prop: str, time: float, default: float) -> float:
-        if prop not in keyframes:
-            return default
-        frames_data = keyframes[prop]
-        if not isinstance(frames_data, list):
-            return default
-        frames = [f for f in frames_data if isinstance(f, dict) and "time" in f and "value" in f]
-        if not frames:
-            return default
-        frames.sort(key=lambda k: k["time"])
-        if time <= frames[0]["time"]:
-            return frames[0]["value"]
-        if time >= frames[-1]["time"]:
-            return frames[-1]["value"]
-        for idx in range(len(frames) - 1):
-            k1, k2 = frames[idx], frames[idx + 1]
-            if k1["time"] <= time <= k2["time"]:
-                duration = k2["time"] - k1["time"]
-                t = (time - k1["time"]) / duration if duration > 0 else 0
-                return k1["value"] + (k2["value"] - k1["value"]) * t
-        return default
-
-    @staticmethod
-    def _calculate_bezier_pos(path_points: List[Dict[str, float]], time: float, duration: float) -> Optional[Tuple[float, float]]:
-        if not path_points or len(path_points) < 2:
-            return None
-        t_norm = max(0.0, min(1.0, time / duration)) if duration > 0 else 0
-        total_segments = len(path_points) - 1
-        current_segment = min(int(t_norm * total_segments), total_segments - 1)
-        segment_t = (t_norm * total_segments) - current_segment
-
-        p0, p1 = path_points[current_segment], path_points[current_segment + 1]
-        p0_x, p0_y = p0.get("x", 0), p0.get("y", 0)
-        p1_x, p1_y = p1.get("x", 0), p1.get("y", 0)
-        cp1_x = p0.get("cp2x", p0_x + (p1_x - p0_x) / 3.0)
-        cp1_y = p0.get("cp2y", p0_y + (p1_y - p0_y) / 3.0)
-        cp2_x = p1.get("cp1x", p0_x + (p1_x - p0_x) * 2.0 / 3.0)
-        cp2_y = p1.get("cp1y", p0_y + (p1_y - p0_y) * 2.0 / 3.0)
-
-        mt = 1 - segment_t
-        x = mt**3 * p0_x + 3 * mt**2 * segment_t * cp1_x + 3 * mt * segment_t**2 * cp2_x + segment_t**3 * p1_x
-        y = mt**3 * p0_y + 3 * mt**2 * segment_t * cp1_y + 3 * mt * segment_t**2 * cp2_y + segment_t**3 * p1_y
-        return x, y
-
     @classmethod
     def _decode_layers(cls, layers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         decoded = []
+        # Layers embedding the same image share one buffer, even when it exceeds the cache budget
+        shared: Dict[str, Tuple[str, np.ndarray]] = {}
         for layer in layers:
             try:
-                img_b64 = layer.get("image_data", "")
-                if not img_b64:
+                image_ref = layer.get("image_data", "")
+                if not image_ref:
                     continue
-                img_data = base64.b64decode(img_b64.split(",", 1)[1])
-                pil = Image.open(python_io.BytesIO(img_data)).convert("RGBA")
+                if image_ref not in shared:
+                    shared[image_ref] = _load_image(image_ref)
+                image_key, img_np = shared[image_ref]
                 decoded.append({
-                    "data": np.array(pil),
+                    "data": img_np,
+                    "image_key": image_key,
                     "keyframes": layer.get("keyframes", {}),
                     "type": layer.get("type", "foreground"),
                     "bg_mode": layer.get("bg_mode", "fit"),
@@ -285,22 +980,56 @@ class AEAnimation(io.ComfyNode):
                     "scale": layer.get("scale", 1.0),
                     "rotation": layer.get("rotation", 0),
                 })
-            except Exception:
+            except Exception as e:
+                print(f"[AE] Layer image error: {e}")
                 continue
         return decoded
 
     @staticmethod
-    def _build_pano_map(dst_w: int, dst_h: int, fov_deg: float, yaw_deg: float, pitch_deg: float, roll_deg: float, src_w: int, src_h: int) -> Tuple[np.ndarray, np.ndarray]:
-        i, j = np.meshgrid(np.arange(dst_w), np.arange(dst_h))
-        fov = np.deg2rad(max(1.0, min(179.0, fov_deg)))
-        aspect = dst_w / max(1e-6, dst_h)
-        x = (i + 0.5) / dst_w * 2 - 1
-        y = (j + 0.5) / dst_h * 2 - 1
-        x = x * np.tan(fov / 2) * aspect
-        y = -y * np.tan(fov / 2)
-        z = np.ones_like(x)
-        dirs = np.stack([x, y, z], axis=-1)
-        dirs = dirs / (np.linalg.norm(dirs, axis=-1, keepdims=True) + 1e-8)
+    def _prepare_layers(layers: List[Dict[str, Any]], draft: int = 1) -> List[Dict[str, Any]]:
+        """
+        Build each layer's read-only render sprite once per execution.
+        Foreground custom masks are decoded and multiplied into alpha here instead of every frame;
+        render functions must not write into the sprite and only allocate when they transform it.
+        Layers sharing a sprite also share its (lazily built) mipmap pyramid. Draft renders
+        (``draft`` > 1) box-filter each sprite down by the canvas divisor first.
+        """
+        pyramids: Dict[int, MipPyramid] = {}
+        reduced: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        for layer in layers:
+            sprite = layer["data"]
+            mask_key = None
+            if layer["type"] == "foreground" and layer.get("customMask"):
+                try:
+                    mask_key, mask_np = _load_image(layer["customMask"])
+                    if mask_np.shape[:2] != sprite.shape[:2]:
+                        mask_np = cv2.resize(mask_np, (sprite.shape[1], sprite.shape[0]), interpolation=cv2.INTER_LINEAR)
+                    sprite = sprite.copy()
+                    sprite[:, :, 3] = (sprite[:, :, 3].astype(np.float32) * mask_np[:, :, 3] / 255.0).astype(np.uint8)
+                    sprite.flags.writeable = False
+                except Exception as e:
+                    mask_key = None
+                    print(f"[AE] Custom mask error: {e}")
+            if draft > 1:
+                # Keyed by the full-size sprite, which the entry keeps alive so its id is not reused
+                if id(sprite) not in reduced:
+                    src_h, src_w = sprite.shape[:2]
+                    small = cv2.resize(sprite, (max(1, round(src_w / draft)), max(1, round(src_h / draft))), interpolation=cv2.INTER_AREA)
+                    small.flags.writeable = False
+                    reduced[id(sprite)] = (sprite, small)
+                sprite = reduced[id(sprite)][1]
+            layer["sprite"] = sprite
+            layer["mips"] = pyramids.setdefault(id(sprite), MipPyramid(sprite))
+            layer["mask_key"] = mask_key
+            layer["opaque"] = bool(sprite[:, :, 3].min() == 255)
+        return layers
+
+    @staticmethod
+    def _build_pano_map(
+        dst_w: int, dst_h: int, fov_deg: float, yaw_deg: float, pitch_deg: float, roll_deg: float, src_w: int, src_h: int,
+        window: Optional[Tuple[int, int, int, int]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        rays = _pano_rays(dst_w, dst_h, float(max(1.0, min(179.0, fov_deg))), window)
 
         cy, sy = np.cos(np.deg2rad(yaw_deg)), np.sin(np.deg2rad(yaw_deg))
         cp, sp = np.cos(np.deg2rad(pitch_deg)), np.sin(np.deg2rad(pitch_deg))
@@ -308,32 +1037,287 @@ class AEAnimation(io.ComfyNode):
         Ry = np.array([[cy, 0, sy], [0, 1, 0], [-sy, 0, cy]])
         Rx = np.array([[1, 0, 0], [0, cp, -sp], [0, sp, cp]])
         Rz = np.array([[cr, -sr, 0], [sr, cr, 0], [0, 0, 1]])
-        dirs_rot = dirs @ (Rz @ Rx @ Ry).T
+        dirs_rot = cv2.transform(rays, Rz @ Rx @ Ry)
+
+        map_x = np.arctan2(dirs_rot[..., 0], dirs_rot[..., 2])
+        map_x *= np.float32(src_w / (2 * np.pi))
+        map_x += np.float32(src_w / 2)
+        map_y = np.clip(dirs_rot[..., 1], -1.0, 1.0, out=dirs_rot[..., 1])
+        map_y = np.arcsin(map_y)
+        map_y *= np.float32(-src_h / np.pi)
+        map_y += np.float32(src_h / 2)
+        return map_x, map_y
+
+    @staticmethod
+    def _pano_source(scene: Dict[str, Any], layer: Dict[str, Any], fov_deg: float) -> np.ndarray:
+        """
+        Equirect source pre-reduced (INTER_AREA, power-of-two steps) to the smallest level still at
+        least twice the output's angular resolution at the view center, i.e. between 2x and 4x of it;
+        sampling a 16K panorama into a small view otherwise aliases and thrashes the cache. Reduced
+        copies are kept per level on the scene runtime.
+        """
+        sprite = layer["sprite"]
+        src_h, src_w = sprite.shape[:2]
+        fov = np.deg2rad(max(1.0, min(179.0, fov_deg)))
+        needed_w = np.pi * scene["height"] / np.tan(fov / 2)
+        level = 0
+        while (src_w >> (level + 1)) >= 2 * needed_w and (src_h >> (level + 1)) >= 2:
+            level += 1
+        if level == 0:
+            return sprite
+        runtime = scene["runtime"]
+        key = (id(sprite), level)
+        with runtime["pano_lock"]:
+            reduced = runtime["pano_sources"].get(key)
+        if reduced is None:
+            t0 = perf_counter()
+            reduced = cv2.resize(sprite, (src_w >> level, src_h >> level), interpolation=cv2.INTER_AREA)
+            if runtime["profiler"].enabled:
+                runtime["profiler"].add("pano_map", perf_counter() - t0)
+            reduced.flags.writeable = False
+            with runtime["pano_lock"]:
+                reduced = runtime["pano_sources"].setdefault(key, reduced)
+        return reduced
+
+    @classmethod
+    def _pano_map(
+        cls,
+        scene: Dict[str, Any],
+        frame: Dict[str, Any],
+        src_w: int,
+        src_h: int,
+        window: Optional[Tuple[int, int, int, int]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Remap tables for this frame's camera from a bounded LRU shared by all render threads,
+        covering the whole frame or only the pixel rectangle ``window``. Tiles build and cache only
+        their own window, so a tiled render's tables stay tile-sized at any output resolution.
+        """
+        runtime = scene["runtime"]
+        key = (frame["cam_fov"], frame["cam_yaw"], frame["cam_pitch"], frame["cam_roll"], src_w, src_h, window)
+        with runtime["pano_lock"]:
+            maps = runtime["pano_maps"].get(key)
+            if maps is not None:
+                runtime["pano_maps"].move_to_end(key)
+        if maps is None:
+            t0 = perf_counter()
+            maps = cls._build_pano_map(
+                scene["width"], scene["height"], frame["cam_fov"], frame["cam_yaw"], frame["cam_pitch"], frame["cam_roll"],
+                src_w, src_h, window
+            )
+            if runtime["profiler"].enabled:
+                runtime["profiler"].add("pano_map", perf_counter() - t0)
+            with runtime["pano_lock"]:
+                cache = runtime["pano_maps"]
+                maps = cache.setdefault(key, maps)
+                # Entry count bound, plus a byte budget for 4K/8K frames (the newest entry always stays)
+                tiled = window is not None
+                while len(cache) > 1 and (
+                    (not tiled and len(cache) > _PANO_MAP_CACHE_ENTRIES)
+                    or sum(mx.nbytes + my.nbytes for mx, my in cache.values())
+                    > (_PANO_TILE_MAP_CACHE_BYTES if tiled else _PANO_MAP_CACHE_BYTES)
+                ):
+                    cache.popitem(last=False)
+        return maps
 
-        lon = np.arctan2(dirs_rot[..., 0], dirs_rot[..., 2])
-        lat = np.arcsin(np.clip(dirs_rot[..., 1], -1.0, 1.0))
-        map_x = ((lon / (2 * np.pi)) + 0.5) * src_w
-        map_y = ((-lat / np.pi) + 0.5) * src_h
-        return map_x.astype(np.float32), map_y.astype(np.float32)
+    @staticmethod
+    def _homography_bounds(img_w: int, img_h: int, M: np.ndarray, width: int, height: int) -> Optional[Tuple[int, int, int, int]]:
+        """Canvas rectangle ``(x0, y0, x1, y1)`` an image warped by ``M`` can touch, or None if off-canvas."""
+        # Bilinear taps reach one texel past the image edge, so bound the expanded source rectangle
+        src = np.array([[-1, -1, 1], [img_w, -1, 1], [img_w, img_h, 1], [-1, img_h, 1]], dtype=np.float64)
+        proj = src @ M.T
+        w = proj[:, 2:3]
+        if np.all(np.isfinite(proj)) and (np.all(w > 1e-9) or np.all(w < -1e-9)):
+            # Homography keeps a sign-consistent convex quad convex: its image is bounded by the corners
+            pts = proj[:, :2] / w
+            x0 = max(0, int(np.floor(max(pts[:, 0].min(), -1.0))) - 1)
+            y0 = max(0, int(np.floor(max(pts[:, 1].min(), -1.0))) - 1)
+            x1 = min(width, int(np.ceil(min(pts[:, 0].max(), width + 1.0))) + 2)
+            y1 = min(height, int(np.ceil(min(pts[:, 1].max(), height + 1.0))) + 2)
+        else:
+            # Quad crosses the camera plane: fall back to the whole canvas
+            x0, y0, x1, y1 = 0, 0, width, height
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return x0, y0, x1, y1
 
     @staticmethod
-    def _render_layer_3d(
+    def _warp_perspective_roi(
         img_np: np.ndarray,
-        mvp: np.ndarray,
-        canvas: np.ndarray,
-        mask_canvas: np.ndarray,
-        opacity: float,
+        M: np.ndarray,
+        width: int,
+        height: int,
+        window: Optional[Tuple[int, int, int, int]] = None,
+        interpolation: int = cv2.INTER_LINEAR
+    ) -> Optional[Tuple[np.ndarray, int, int]]:
+        """
+        Warp ``img_np`` by homography ``M`` into only the canvas rectangle it can touch, further
+        clipped to ``window = (x0, y0, x1, y1)`` when given. Returns ``(warped, x0, y0)`` with
+        ``warped`` covering canvas[y0:y0+h, x0:x0+w], or None when nothing lands inside.
+        """
+        img_h, img_w = img_np.shape[:2]
+        bounds = AEAnimation._homography_bounds(img_w, img_h, M, width, height)
+        if bounds is None:
+            return None
+        x0, y0, x1, y1 = bounds
+        if window is not None:
+            x0, y0 = max(x0, window[0]), max(y0, window[1])
+            x1, y1 = min(x1, window[2]), min(y1, window[3])
+            if x1 <= x0 or y1 <= y0:
+                return None
+
+        # Same inverse map OpenCV builds internally, shifted so ROI pixel (0, 0) is canvas (x0, y0)
+        _, M_inv = cv2.invert(M.astype(np.float64), flags=cv2.DECOMP_LU)
+        M_inv[:, 2] += M_inv[:, 0] * x0 + M_inv[:, 1] * y0
+        if not M[2, 0] and not M[2, 1] and M[2, 2] == 1:
+            # Affine (fused 2D layers): cheaper per-pixel mapping, no perspective divide
+            return cv2.warpAffine(
+                img_np, M_inv[:2], (x1 - x0, y1 - y0),
+                flags=interpolation | cv2.WARP_INVERSE_MAP,
+                borderMode=cv2.BORDER_CONSTANT, borderValue=(0, 0, 0, 0)
+            ), x0, y0
+        warped = cv2.warpPerspective(
+            img_np, M_inv, (x1 - x0, y1 - y0),
+            flags=interpolation | cv2.WARP_INVERSE_MAP,
+            borderMode=cv2.BORDER_CONSTANT, borderValue=(0, 0, 0, 0)
+        )
+        return warped, x0, y0
+
+    @staticmethod
+    def _layer_extent(
+        img_w: int, img_h: int,
+        scale: float,
+        is_foreground: bool,
+        bg_mode: str,
+        width: int, height: int,
+        rot3d: bool = False
+    ) -> Tuple[float, float]:
+        """
+        Unrounded on-screen size of a 2D layer: ``scale`` times the background fit (``fit``/``fill``, or
+        ``stretch`` to the canvas; the 3D-rotation path treats ``stretch`` as ``fit``). Non-positive
+        scales keep the source size, except for backgrounds on the plain 2D path.
+        """
+        if is_foreground:
+            final_scale = scale
+        elif bg_mode == "stretch" and not rot3d:
+            return width * scale, height * scale
+        else:
+            fit, fill = min(width / img_w, height / img_h), max(width / img_w, height / img_h)
+            final_scale = {"fit": fit, "stretch": fit, "fill": fill}.get(bg_mode, 1.0) * scale
+        if final_scale <= 0 and (is_foreground or rot3d):
+            final_scale = 1.0
+        return img_w * final_scale, img_h * final_scale
+
+    @staticmethod
+    def _layer_transform(
+        kind: str,
+        args: Dict[str, Any],
+        img_w: int,
+        img_h: int,
         is_foreground: bool,
         width: int,
         height: int
-    ) -> None:
-        """Render a layer with 3D perspective transform."""
+    ) -> Optional[np.ndarray]:
+        """
+        Fused sprite-to-canvas transform (3x3) of a ``2d`` or ``2d_rot3d`` layer, or None when culled.
+        Background fit, scale, rotation and the sub-pixel position compose into one affine map (a
+        perspective map under 3D rotation), so the sprite is resampled once, straight into the canvas.
+        """
+        extent_w, extent_h = AEAnimation._layer_extent(
+            img_w, img_h, args["scale"], is_foreground, args["bg_mode"], width, height, rot3d=kind == "2d_rot3d"
+        )
+        if extent_w <= 0 or extent_h <= 0:
+            return None
+        sx, sy = extent_w / img_w, extent_h / img_h
+        if kind == "2d_rot3d":
+            src_pts, dst_pts = AEAnimation._rotation_quad(
+                extent_w, extent_h, args["x"], args["y"], args["rot_x"], args["rot_y"], args["rot_z"], args["perspective"], width, height
+            )
+            if np.any(dst_pts < -width * 2) or np.any(dst_pts > width * 3):
+                return None
+            try:
+                M = cv2.getPerspectiveTransform(src_pts, dst_pts)
+            except cv2.error:
+                return None
+            return M @ np.diag([sx, sy, 1.0])
+
+        # Scale, then rotate (counter-clockwise, as cv2.getRotationMatrix2D) about the sprite's center
+        # pixel, which lands on the canvas center offset by (x, y)
+        theta = np.deg2rad(args["rotation"]) if abs(args["rotation"]) > 0.1 else 0.0
+        c, s = np.cos(theta), np.sin(theta)
+        A = np.array([[c * sx, s * sy], [-s * sx, c * sy]])
+        t = np.array([width // 2 + args["x"], height // 2 + args["y"]]) - A @ np.array([img_w // 2, img_h // 2])
+        return np.array([[A[0, 0], A[0, 1], t[0]], [A[1, 0], A[1, 1], t[1]], [0.0, 0.0, 1.0]])
+
+    @staticmethod
+    def _edge_scale(corners: np.ndarray, img_w: int, img_h: int) -> float:
+        """Largest ratio of a projected quad edge (top, right, bottom, left) to the matching source edge."""
+        edges = np.linalg.norm(corners - np.roll(corners, -1, axis=0), axis=1)
+        return float(np.max(edges / [img_w, img_h, img_w, img_h]))
+
+    @staticmethod
+    def _place_layer_fused(
+        img_np: np.ndarray,
+        M: Optional[np.ndarray],
+        pixel_centers: bool = True,
+        mips: Optional[MipPyramid] = None
+    ) -> Optional[Tuple[Any, ...]]:
+        """
+        Place a sprite under one sprite-to-canvas transform ``M`` (see ``_layer_transform``): a paste
+        when ``M`` is an integer translation, else a single warp, from the closest mip level when
+        ``mips`` is given. ``pixel_centers`` tells whether ``M`` maps pixel centers (affine 2D) or
+        pixel corners (quads) when rescaling it to a mip level.
+        """
+        if M is None:
+            return None
+        if np.array_equal(M[:, :2], np.eye(3)[:, :2]) and M[2, 2] == 1 and not (M[0, 2] % 1 or M[1, 2] % 1):
+            return "paste", img_np, int(M[0, 2]), int(M[1, 2])
+        if mips is not None:
+            img_h, img_w = img_np.shape[:2]
+            quad = np.array([[0, 0, 1], [img_w, 0, 1], [img_w, img_h, 1], [0, img_h, 1]], dtype=np.float64) @ M.T
+            level = mips.for_scale(AEAnimation._edge_scale(quad[:, :2] / quad[:, 2:3], img_w, img_h))
+            if level is not img_np:
+                rx, ry = img_w / level.shape[1], img_h / level.shape[0]
+                ox, oy = ((rx - 1) / 2, (ry - 1) / 2) if pixel_centers else (0.0, 0.0)
+                M = M @ np.array([[rx, 0.0, ox], [0.0, ry, oy], [0.0, 0.0, 1.0]])
+                img_np = level
+        return "warp", img_np, M
+
+    @staticmethod
+    def _resize_from(
+        img_np: np.ndarray,
+        mips: Optional[MipPyramid],
+        new_w: int,
+        new_h: int,
+        interpolation: int = cv2.INTER_LINEAR
+    ) -> np.ndarray:
+        """``cv2.resize`` of a sprite to ``new_w`` x ``new_h``, starting from its closest mip level when given."""
+        if mips is not None:
+            img_h, img_w = img_np.shape[:2]
+            img_np = mips.for_scale(min(new_w / img_w, new_h / img_h))
+        return cv2.resize(img_np, (new_w, new_h), interpolation=interpolation)
+
+    @staticmethod
+    def _place_layer_3d(
+        img_np: np.ndarray,
+        mvp: np.ndarray,
+        width: int,
+        height: int,
+        mips: Optional[MipPyramid] = None,
+        corners: Optional[np.ndarray] = None
+    ) -> Optional[Tuple[Any, ...]]:
+        """Place a layer with 3D perspective transform (``corners``: precomputed ``project_corners`` result)."""
         img_h, img_w = img_np.shape[:2]
-        dst_corners = Transform3D.project_corners(img_w, img_h, mvp, width, height)
+        dst_corners = corners if corners is not None else Transform3D.project_corners(img_w, img_h, mvp, width, height)
 
         # Check if layer is visible (all corners within reasonable bounds)
         if np.any(dst_corners < -width * 2) or np.any(dst_corners > width * 3):
-            return
+            return None
+
+        if mips is not None:
+            # Least-minified projected edge, so foreshortened planes stay sharp at their near side
+            img_np = mips.for_scale(AEAnimation._edge_scale(dst_corners, img_w, img_h))
+            img_h, img_w = img_np.shape[:2]
 
         # Source corners (original image)
         src_corners = np.array([
@@ -343,54 +1327,95 @@ class AEAnimation(io.ComfyNode):
         # Get perspective transform matrix
         try:
             M = cv2.getPerspectiveTransform(src_corners, dst_corners)
-            warped = cv2.warpPerspective(img_np, M, (width, height), borderMode=cv2.BORDER_CONSTANT, borderValue=(0, 0, 0, 0))
         except cv2.error:
-            return
-
-        # Update mask for foreground
-        if is_foreground and warped.shape[2] == 4:
-            mask_layer = (warped[:, :, 3].astype(np.float32) * opacity).astype(np.uint8)
-            mask_canvas[:] = np.maximum(mask_canvas, mask_layer)
+            return None
+        return "warp", img_np, M
 
-        # Composite
-        if warped.shape[2] == 4:
-            alpha = (warped[:, :, 3:4].astype(np.float32) / 255.0) * opacity
-            for c in range(3):
-                canvas[:, :, c] = (canvas[:, :, c] * (1 - alpha[:, :, 0]) + warped[:, :, c] * alpha[:, :, 0]).astype(np.uint8)
-            canvas[:, :, 3] = np.maximum(canvas[:, :, 3], (alpha[:, :, 0] * 255).astype(np.uint8))
+    @staticmethod
+    def _rotation_quad(
+        current_w: int, current_h: int,
+        x: float, y: float,
+        rot_x: float, rot_y: float, rot_z: float,
+        perspective: float,
+        width: int, height: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Source and canvas corners of a 2D layer (already scaled to ``current_w`` x ``current_h``) under 3D rotation."""
+        # 转换为弧度
+        rx = np.deg2rad(rot_x)
+        ry = np.deg2rad(rot_y)
+        rz = np.deg2rad(rot_z)
+        
+        # 旋转矩阵
+        cos_x, sin_x = np.cos(rx), np.sin(rx)
+        cos_y, sin_y = np.cos(ry), np.sin(ry)
+        cos_z, sin_z = np.cos(rz), np.sin(rz)
+        
+        # 原始四个角点（相对于中心，与前端GPU渲染器一致）
+        # 前端WebGPU使用Y向上的坐标系，y=hh是bottom，y=-hh是top
+        # 后端图像坐标系Y向下，所以需要在投影后翻转Y
+        hw, hh = current_w / 2, current_h / 2
+        # 顺序与前端一致：bottom-left, bottom-right, top-right, top-left
+        # 对应src_pts的顺序：[0,h], [w,h], [w,0], [0,0]（前端y=hh是bottom，y=-hh是top）
+        px = np.array([-hw, hw, hw, -hw], dtype=np.float64)
+        py = np.array([hh, hh, -hh, -hh], dtype=np.float64)
+        pz = np.zeros(4)
+
+        # 应用 3D 旋转（顺序：Z -> Y -> X，与前端一致），四个角点一次性计算
+        # Z 轴旋转
+        x1 = px * cos_z - py * sin_z
+        y1 = px * sin_z + py * cos_z
+        z1 = pz
+
+        # Y 轴旋转
+        x2 = x1 * cos_y + z1 * sin_y
+        z2 = -x1 * sin_y + z1 * cos_y
+        y2 = y1
+
+        # X 轴旋转
+        y3 = y2 * cos_x - z2 * sin_x
+        z3 = y2 * sin_x + z2 * cos_x
+        x3 = x2
+
+        # 透视投影（不翻转Y轴，因为src_pts已经按照正确的顺序排列）
+        proj_scale = perspective / (perspective + z3)
+        proj_x = x3 * proj_scale
+        proj_y = y3 * proj_scale
+
+        # 源角点（图像坐标系，Y向下）
+        # 顺序与旋转角点一致：bottom-left, bottom-right, top-right, top-left
+        src_pts = np.array([
+            [0, current_h],      # bottom-left
+            [current_w, current_h],  # bottom-right
+            [current_w, 0],      # top-right
+            [0, 0]               # top-left
+        ], dtype=np.float32)
+        
+        # 目标角点（加上画布中心偏移）
+        center_x = width / 2 + x
+        center_y = height / 2 + y
+        dst_pts = np.stack([center_x + proj_x, center_y + proj_y], axis=1).astype(np.float32)
+        return src_pts, dst_pts
 
     @staticmethod
-    def _render_layer_2d_with_3d_rotation(
+    def _place_layer_2d_with_3d_rotation(
         img_np: np.ndarray,
         x: float, y: float,
         scale: float,
         rot_x: float, rot_y: float, rot_z: float,
-        canvas: np.ndarray,
-        mask_canvas: np.ndarray,
-        opacity: float,
         is_foreground: bool,
         width: int,
         height: int,
         perspective: float = 1000.0,
-        bg_mode: str = "fit"
-    ) -> None:
-        """Render a layer with 3D rotation using perspective transform."""
+        bg_mode: str = "fit",
+        mips: Optional[MipPyramid] = None,
+        interpolation: int = cv2.INTER_LINEAR
+    ) -> Optional[Tuple[Any, ...]]:
+        """Place a layer with 3D rotation using perspective transform."""
         orig_w, orig_h = img_np.shape[1], img_np.shape[0]
-
-        # Background scaling
-        base_scale = 1.0
-        if not is_foreground:
-            if bg_mode == "fit":
-                base_scale = min(width / orig_w, height / orig_h)
-            elif bg_mode == "fill":
-                base_scale = max(width / orig_w, height / orig_h)
-            elif bg_mode == "stretch":
-                base_scale = min(width / orig_w, height / orig_h)
-        
-        final_scale = base_scale * scale
-        if final_scale != 1.0 and final_scale > 0:
-            new_w, new_h = max(1, int(orig_w * final_scale)), max(1, int(orig_h * final_scale))
-            img_np = cv2.resize(img_np, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        extent_w, extent_h = AEAnimation._layer_extent(orig_w, orig_h, scale, is_foreground, bg_mode, width, height, rot3d=True)
+        new_w, new_h = max(1, int(extent_w)), max(1, int(extent_h))
+        if (new_w, new_h) != (orig_w, orig_h):
+            img_np = AEAnimation._resize_from(img_np, mips, new_w, new_h, interpolation)
 
         current_w, current_h = img_np.shape[1], img_np.shape[0]
         
@@ -398,196 +1423,1032 @@ class AEAnimation(io.ComfyNode):
         has_3d_rotation = abs(rot_x) > 0.1 or abs(rot_y) > 0.1 or abs(rot_z) > 0.1
         
         if has_3d_rotation:
-            # 转换为弧度
-            rx = np.deg2rad(rot_x)
-            ry = np.deg2rad(rot_y)
-            rz = np.deg2rad(rot_z)
-            
-            # 旋转矩阵
-            cos_x, sin_x = np.cos(rx), np.sin(rx)
-            cos_y, sin_y = np.cos(ry), np.sin(ry)
-            cos_z, sin_z = np.cos(rz), np.sin(rz)
-            
-            # 原始四个角点（相对于中心，与前端GPU渲染器一致）
-            # 前端WebGPU使用Y向上的坐标系，y=hh是bottom，y=-hh是top
-            # 后端图像坐标系Y向下，所以需要在投影后翻转Y
-            hw, hh = current_w / 2, current_h / 2
-            # 顺序与前端一致：bottom-left, bottom-right, top-right, top-left
-            # 对应src_pts的顺序：[0,h], [w,h], [w,0], [0,0]
-            corners_3d = np.array([
-                [-hw, hh, 0],   # bottom-left (前端y=hh是bottom)
-                [hw, hh, 0],    # bottom-right
-                [hw, -hh, 0],   # top-right (前端y=-hh是top)
-                [-hw, -hh, 0]   # top-left
-            ], dtype=np.float64)
-            
-            # 应用 3D 旋转（顺序：Z -> Y -> X，与前端一致）
-            transformed = []
-            for p in corners_3d:
-                px, py, pz = p
-                
-                # Z 轴旋转
-                x1 = px * cos_z - py * sin_z
-                y1 = px * sin_z + py * cos_z
-                z1 = pz
-                
-                # Y 轴旋转
-                x2 = x1 * cos_y + z1 * sin_y
-                z2 = -x1 * sin_y + z1 * cos_y
-                y2 = y1
-                
-                # X 轴旋转
-                y3 = y2 * cos_x - z2 * sin_x
-                z3 = y2 * sin_x + z2 * cos_x
-                x3 = x2
-                
-                # 透视投影
-                proj_scale = perspective / (perspective + z3)
-                proj_x = x3 * proj_scale
-                # 不翻转Y轴，因为src_pts已经按照正确的顺序排列
-                proj_y = y3 * proj_scale
-                
-                transformed.append([proj_x, proj_y])
-            
-            # 源角点（图像坐标系，Y向下）
-            # 顺序与corners_3d一致：bottom-left, bottom-right, top-right, top-left
-            src_pts = np.array([
-                [0, current_h],      # bottom-left
-                [current_w, current_h],  # bottom-right
-                [current_w, 0],      # top-right
-                [0, 0]               # top-left
-            ], dtype=np.float32)
-            
-            # 目标角点（加上画布中心偏移）
-            center_x = width / 2 + x
-            center_y = height / 2 + y
-            dst_pts = np.array([
-                [center_x + transformed[0][0], center_y + transformed[0][1]],
-                [center_x + transformed[1][0], center_y + transformed[1][1]],
-                [center_x + transformed[2][0], center_y + transformed[2][1]],
-                [center_x + transformed[3][0], center_y + transformed[3][1]]
-            ], dtype=np.float32)
-            
+            src_pts, dst_pts = AEAnimation._rotation_quad(current_w, current_h, x, y, rot_x, rot_y, rot_z, perspective, width, height)
+
             # 检查目标点是否在合理范围内
             if np.any(dst_pts < -width * 2) or np.any(dst_pts > width * 3):
-                return
+                return None
             
-            # 透视变换
+            # 透视变换（仅投影四边形覆盖的区域）
             try:
                 M = cv2.getPerspectiveTransform(src_pts, dst_pts)
-                warped = cv2.warpPerspective(img_np, M, (width, height), 
-                                            borderMode=cv2.BORDER_CONSTANT, 
-                                            borderValue=(0, 0, 0, 0))
             except cv2.error:
-                return
-            
-            # 合成到画布
-            if is_foreground and warped.shape[2] == 4:
-                mask_layer = (warped[:, :, 3].astype(np.float32) * opacity).astype(np.uint8)
-                mask_canvas[:] = np.maximum(mask_canvas, mask_layer)
-            
-            if warped.shape[2] == 4:
-                alpha = (warped[:, :, 3:4].astype(np.float32) / 255.0) * opacity
-                for c in range(3):
-                    canvas[:, :, c] = (canvas[:, :, c] * (1 - alpha[:, :, 0]) + 
-                                      warped[:, :, c] * alpha[:, :, 0]).astype(np.uint8)
-                canvas[:, :, 3] = np.maximum(canvas[:, :, 3], (alpha[:, :, 0] * 255).astype(np.uint8))
-            return
+                return None
+            return "warp", img_np, M
         
         # 无 3D 旋转时使用简单的粘贴
         paste_x = int(width // 2 + x - current_w // 2)
         paste_y = int(height // 2 + y - current_h // 2)
-
-        # Update mask for foreground
-        if is_foreground and img_np.shape[2] == 4:
-            mask_layer = (img_np[:, :, 3].astype(np.float32) * opacity).astype(np.uint8)
-            y1, x1 = max(0, paste_y), max(0, paste_x)
-            y2, x2 = min(paste_y + current_h, height), min(paste_x + current_w, width)
-            if y2 > y1 and x2 > x1:
-                sy, sx = max(0, -paste_y), max(0, -paste_x)
-                src = mask_layer[sy:sy + (y2 - y1), sx:sx + (x2 - x1)]
-                mask_canvas[y1:y2, x1:x2] = np.maximum(mask_canvas[y1:y2, x1:x2], src)
-
-        # Composite
-        y1, x1 = max(0, paste_y), max(0, paste_x)
-        y2, x2 = min(paste_y + current_h, height), min(paste_x + current_w, width)
-        if y2 > y1 and x2 > x1:
-            sy, sx = max(0, -paste_y), max(0, -paste_x)
-            src = img_np[sy:sy + (y2 - y1), sx:sx + (x2 - x1)]
-            dst = canvas[y1:y2, x1:x2]
-            if src.shape[2] == 4:
-                alpha = (src[:, :, 3:4].astype(np.float32) / 255.0) * opacity
-                for c in range(3):
-                    dst[:, :, c] = (dst[:, :, c] * (1 - alpha[:, :, 0]) + src[:, :, c] * alpha[:, :, 0]).astype(np.uint8)
-                dst[:, :, 3] = np.maximum(dst[:, :, 3], (alpha[:, :, 0] * 255).astype(np.uint8))
+        return "paste", img_np, paste_x, paste_y
 
     @staticmethod
-    def _render_layer_2d(
+    def _place_layer_2d(
         img_np: np.ndarray,
         x: float, y: float,
         scale: float, rotation: float,
-        canvas: np.ndarray,
-        mask_canvas: np.ndarray,
-        opacity: float,
         is_foreground: bool,
         width: int,
         height: int,
-        bg_mode: str = "fit"
-    ) -> None:
-        """Render a layer with 2D transform (legacy mode)."""
+        bg_mode: str = "fit",
+        mips: Optional[MipPyramid] = None,
+        interpolation: int = cv2.INTER_LINEAR
+    ) -> Tuple[Any, ...]:
+        """Place a layer with 2D transform (legacy mode)."""
         orig_w, orig_h = img_np.shape[1], img_np.shape[0]
-
-        # Background scaling
-        if not is_foreground:
-            if bg_mode == "fit":
-                base_scale = min(width / orig_w, height / orig_h)
-            elif bg_mode == "fill":
-                base_scale = max(width / orig_w, height / orig_h)
-            elif bg_mode == "stretch":
-                new_w, new_h = max(1, int(width * scale)), max(1, int(height * scale))
-                img_np = cv2.resize(img_np, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
-                base_scale = None
-            else:
-                base_scale = 1.0
-            if base_scale is not None:
-                final_scale = base_scale * scale
-                new_w, new_h = max(1, int(orig_w * final_scale)), max(1, int(orig_h * final_scale))
-                img_np = cv2.resize(img_np, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
-        elif scale != 1.0 and scale > 0:
-            new_w, new_h = max(1, int(orig_w * scale)), max(1, int(orig_h * scale))
-            img_np = cv2.resize(img_np, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        extent_w, extent_h = AEAnimation._layer_extent(orig_w, orig_h, scale, is_foreground, bg_mode, width, height)
+        new_w, new_h = max(1, int(extent_w)), max(1, int(extent_h))
+        if (new_w, new_h) != (orig_w, orig_h):
+            img_np = AEAnimation._resize_from(img_np, mips, new_w, new_h, interpolation)
 
         current_w, current_h = img_np.shape[1], img_np.shape[0]
 
         if abs(rotation) > 0.1:
             center = (current_w // 2, current_h // 2)
             matrix = cv2.getRotationMatrix2D(center, rotation, 1.0)
-            img_np = cv2.warpAffine(img_np, matrix, (current_w, current_h), borderMode=cv2.BORDER_CONSTANT, borderValue=(0, 0, 0, 0))
+            img_np = cv2.warpAffine(
+                img_np, matrix, (current_w, current_h), flags=interpolation,
+                borderMode=cv2.BORDER_CONSTANT, borderValue=(0, 0, 0, 0)
+            )
 
         paste_x = int(width // 2 + x - current_w // 2)
         paste_y = int(height // 2 + y - current_h // 2)
+        return "paste", img_np, paste_x, paste_y
 
-        # Update mask for foreground
-        if is_foreground:
-            mask_layer = (img_np[:, :, 3].astype(np.float32) * opacity).astype(np.uint8)
-            y1, x1 = max(0, paste_y), max(0, paste_x)
-            y2, x2 = min(paste_y + current_h, height), min(paste_x + current_w, width)
-            if y2 > y1 and x2 > x1:
-                sy, sx = max(0, -paste_y), max(0, -paste_x)
-                src = mask_layer[sy:sy + (y2 - y1), sx:sx + (x2 - x1)]
-                mask_canvas[y1:y2, x1:x2] = np.maximum(mask_canvas[y1:y2, x1:x2], src)
-
-        # Composite
-        y1, x1 = max(0, paste_y), max(0, paste_x)
-        y2, x2 = min(paste_y + current_h, height), min(paste_x + current_w, width)
+    @staticmethod
+    def _composite_at(
+        canvas: np.ndarray,
+        mask_canvas: Optional[np.ndarray],
+        img_np: np.ndarray,
+        x: int,
+        y: int,
+        opacity: float,
+        origin: Tuple[int, int] = (0, 0)
+    ) -> None:
+        """
+        Composite ``img_np`` with its top-left at frame pixel (x, y) into ``canvas``, a window of the
+        frame whose top-left is frame pixel ``origin``; parts outside the window are clipped.
+        """
+        ox, oy = origin
+        x1, y1 = max(ox, x), max(oy, y)
+        x2, y2 = min(x + img_np.shape[1], ox + canvas.shape[1]), min(y + img_np.shape[0], oy + canvas.shape[0])
         if y2 > y1 and x2 > x1:
-            sy, sx = max(0, -paste_y), max(0, -paste_x)
-            src = img_np[sy:sy + (y2 - y1), sx:sx + (x2 - x1)]
-            dst = canvas[y1:y2, x1:x2]
-            alpha = (src[:, :, 3:4].astype(np.float32) / 255.0) * opacity
-            for c in range(3):
-                dst[:, :, c] = (dst[:, :, c] * (1 - alpha[:, :, 0]) + src[:, :, c] * alpha[:, :, 0]).astype(np.uint8)
-            dst[:, :, 3] = np.maximum(dst[:, :, 3], (alpha[:, :, 0] * 255).astype(np.uint8))
+            src = img_np[y1 - y:y2 - y, x1 - x:x2 - x]
+            AlphaCompositor.for_thread().composite(
+                canvas[y1 - oy:y2 - oy, x1 - ox:x2 - ox],
+                mask_canvas[y1 - oy:y2 - oy, x1 - ox:x2 - ox] if mask_canvas is not None else None,
+                src, opacity
+            )
+
+    @classmethod
+    def _render_frame(
+        cls,
+        scene: Dict[str, Any],
+        i: int,
+        canvas: Optional[np.ndarray] = None,
+        mask_canvas: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Render frame ``i`` of the scene's range; returns the RGBA canvas and the raw foreground mask.
+        Pass ``canvas``/``mask_canvas`` to render into reusable buffers instead of fresh ones.
+        """
+        width, height = scene["width"], scene["height"]
+        frame, layer_render_data = cls._resolve_frame(scene, i)
+        blurred = cls._motion_samples(scene, i, layer_render_data) if scene["motion"] else {}
+
+        # Static layers at the bottom of the stack come from a cached plate
+        n_static = cls._static_run(scene, layer_render_data)
+        if canvas is None:
+            canvas = np.empty((height, width, 4), dtype=np.uint8)
+        if mask_canvas is None:
+            mask_canvas = np.empty((height, width), dtype=np.uint8)
+        if n_static:
+            plate_canvas, plate_mask = cls._static_plate(scene, frame, layer_render_data[:n_static])
+            np.copyto(canvas, plate_canvas)
+            np.copyto(mask_canvas, plate_mask)
+        else:
+            canvas.fill(0)
+            mask_canvas.fill(0)
+        layer_render_data = cls._cull_layers(scene, frame, layer_render_data[n_static:], blurred)
+
+        # Render layers
+        for data in layer_render_data:
+            if data["index"] in blurred:
+                cls._render_layer_blurred(scene, data, *blurred[data["index"]], canvas, mask_canvas)
+            else:
+                cls._render_layer(scene, frame, data, canvas, mask_canvas)
+
+        return canvas, mask_canvas
+
+    @classmethod
+    def _render_frame_tiled(
+        cls,
+        scene: Dict[str, Any],
+        i: int,
+        frame_out: np.ndarray,
+        mask_out: np.ndarray,
+        mask_expansion: int,
+        mask_feather: int,
+        buffers: List[np.ndarray]
+    ) -> None:
+        """
+        Render frame ``i`` tile by tile straight into its output slices, so canvases, warp outputs and
+        compositing temporaries are tile-sized. Layer placements are computed once per frame. Each tile
+        is drawn with a halo as wide as the mask post-processing reach, which makes the cropped result
+        identical to a full-frame render. Static bottom layers come from per-tile plates.
+        ``buffers`` holds flat uint8 storage reused across calls.
+        """
+        width, height, tile = scene["width"], scene["height"], scene["tile_size"]
+        halo = cls._mask_halo(mask_expansion, mask_feather)
+        profiler = scene["runtime"]["profiler"]
+        scale = np.float32(255.0)
+        frame, layer_render_data = cls._resolve_frame(scene, i)
+
+        blurred = cls._motion_samples(scene, i, layer_render_data) if scene["motion"] else {}
+        n_static = cls._static_run(scene, layer_render_data)
+        static_stack = layer_render_data[:n_static]
+        layer_render_data = cls._cull_layers(scene, frame, layer_render_data[n_static:], blurred)
+        placed = []
+        for data in layer_render_data:
+            if data["index"] in blurred:
+                placed.append((data, None))
+                continue
+            t0 = perf_counter()
+            placement = cls._layer_placement(scene, frame, data)
+            if profiler.enabled:
+                profiler.add(f"warp:{data['path']}", perf_counter() - t0, layer=data["index"])
+            if placement is not None:
+                placed.append((data, placement))
+
+        # Contiguous canvases carved from flat storage sized for the largest haloed tile
+        n_pixels = min(height, tile + 2 * halo) * min(width, tile + 2 * halo)
+        if not buffers or buffers[1].size < n_pixels:
+            buffers[:] = [np.empty(n_pixels * 4, dtype=np.uint8), np.empty(n_pixels, dtype=np.uint8)]
+
+        for tx, ty, window in cls._tile_windows(width, height, tile, halo):
+            t0 = perf_counter()
+            x0, y0, x1, y1 = window
+            win_h, win_w = y1 - y0, x1 - x0
+            canvas = buffers[0][:win_h * win_w * 4].reshape(win_h, win_w, 4)
+            mask_canvas = buffers[1][:win_h * win_w].reshape(win_h, win_w)
+            if n_static:
+                plate_canvas, plate_mask = cls._static_plate(scene, frame, static_stack, window)
+                np.copyto(canvas, plate_canvas)
+                np.copyto(mask_canvas, plate_mask)
+            else:
+                canvas.fill(0)
+                mask_canvas.fill(0)
+            for data, placement in placed:
+                if placement is None:
+                    cls._render_layer_blurred(scene, data, *blurred[data["index"]], canvas, mask_canvas, (x0, y0))
+                else:
+                    cls._render_layer(scene, frame, data, canvas, mask_canvas, (x0, y0), placement)
+            t1 = perf_counter()
+            mask_tile = cls._postprocess_mask(mask_canvas, mask_expansion, mask_feather)
+            t2 = perf_counter()
+            th, tw = min(tile, height - ty), min(tile, width - tx)
+            rows, cols = slice(ty - y0, ty - y0 + th), slice(tx - x0, tx - x0 + tw)
+            np.divide(canvas[rows, cols, :3], scale, out=frame_out[ty:ty + th, tx:tx + tw], dtype=np.float32)
+            np.divide(mask_tile[rows, cols], scale, out=mask_out[ty:ty + th, tx:tx + tw], dtype=np.float32)
+            if profiler.enabled:
+                profiler.add("render", t1 - t0)
+                profiler.add("mask", t2 - t1)
+                profiler.add("convert", perf_counter() - t2)
+
+    @staticmethod
+    def _tile_windows(width: int, height: int, tile: int, halo: int) -> List[Tuple[int, int, Tuple[int, int, int, int]]]:
+        """Tiles of a frame as ``(tx, ty, window)``: the tile origin and its haloed ``(x0, y0, x1, y1)`` rectangle."""
+        return [
+            (tx, ty, (max(0, tx - halo), max(0, ty - halo), min(width, tx + tile + halo), min(height, ty + tile + halo)))
+            for ty in range(0, height, tile)
+            for tx in range(0, width, tile)
+        ]
+
+    @classmethod
+    def _motion_samples(
+        cls,
+        scene: Dict[str, Any],
+        i: int,
+        layer_render_data: List[Dict[str, Any]]
+    ) -> Dict[int, Tuple[List[Tuple[Dict[str, Any], Dict[str, Any]]], Optional[Tuple[int, int, int, int]]]]:
+        """
+        Sub-frame samples for the layers of frame ``i`` that move on screen during the shutter, by layer
+        index: ``(samples, box)`` with ``samples`` a list of resolved ``(frame, data)`` sub-frame states
+        and ``box`` the canvas rectangle they cover (None = whole canvas). Each layer's sample count
+        follows the on-screen travel of its projected corners, one sample per pixel up to the cap;
+        layers that barely move are left out and render once, as without blur.
+        """
+        t0 = perf_counter()
+        motion = scene["motion"]
+        n_sub = motion["samples"]
+        width, height = scene["width"], scene["height"]
+        sub_scene = {
+            **scene,
+            "cam_values": {p: v[i].tolist() for p, v in motion["cam_values"].items()},
+            "layer_values": [{p: v[i].tolist() for p, v in values.items()} for values in motion["layer_values"]],
+        }
+        sub_scene["geometry"] = cls._scene_geometry(scene, sub_scene["cam_values"], sub_scene["layer_values"])
+        subs = [cls._resolve_frame(sub_scene, m) for m in range(n_sub)]
+        by_index = [{data["index"]: data for data in stack} for _, stack in subs]
+
+        blurred = {}
+        for data in layer_render_data:
+            index = data["index"]
+            if scene["static_layers"][index]:
+                continue
+            states = [(subs[m][0], by_index[m][index]) for m in range(n_sub)]
+            if data["is_pano_bg"]:
+                # Panorama moves with the camera's rotation: degrees scaled to output pixels
+                fov = max(1.0, min(179.0, states[0][0]["cam_fov"]))
+                travel = sum(
+                    max(abs(b[key] - a[key]) for key in ("cam_yaw", "cam_pitch", "cam_roll", "cam_fov"))
+                    for (a, _), (b, _) in zip(states, states[1:])
+                ) * width / fov
+                box = None
+            else:
+                img_h, img_w = data["layer"]["sprite"].shape[:2]
+                corners, boxes = [], []
+                for frame, sub in states:
+                    kind, args = cls._layer_call(sub_scene, frame, sub)
+                    geometry = cls._layer_inverse_map(
+                        kind, args, img_w, img_h, sub["is_foreground"], width, height, scene["layer_warp"] == "fused"
+                    )
+                    if geometry is None:
+                        corners.append(None)
+                        continue
+                    stage_inv, (stage_w, stage_h), bounds = geometry
+                    quad = np.array([[0, 0, 1], [stage_w, 0, 1], [stage_w, stage_h, 1], [0, stage_h, 1]], dtype=np.float64)
+                    proj = quad @ np.linalg.inv(stage_inv).T
+                    corners.append(proj[:, :2] / proj[:, 2:3])
+                    boxes.append(bounds)
+                if not boxes:
+                    continue
+                if any(c is None for c in corners):
+                    # Enters or leaves the canvas during the shutter
+                    travel = float("inf")
+                else:
+                    travel = sum(float(np.abs(b - a).max()) for a, b in zip(corners, corners[1:]))
+                box = (min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes))
+            n = int(min(n_sub, np.ceil(travel / _MOTION_BLUR_PX_PER_SAMPLE))) if np.isfinite(travel) else n_sub
+            if n >= 2:
+                # n evenly spread picks from the sub-frame grid
+                blurred[index] = ([states[(2 * k + 1) * n_sub // (2 * n)] for k in range(n)], box)
+        profiler = scene["runtime"]["profiler"]
+        if profiler.enabled:
+            profiler.add("motion_blur", perf_counter() - t0)
+        return blurred
+
+    @classmethod
+    def _render_layer_blurred(
+        cls,
+        scene: Dict[str, Any],
+        data: Dict[str, Any],
+        samples: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+        box: Optional[Tuple[int, int, int, int]],
+        canvas: np.ndarray,
+        mask_canvas: np.ndarray,
+        origin: Tuple[int, int] = (0, 0)
+    ) -> None:
+        """
+        Draw a layer's sub-frame samples alone into a box-sized scratch canvas, average them in a
+        reusable premultiplied float buffer, then composite the blurred layer once at full opacity
+        (opacity is already in the averaged alpha).
+        """
+        ox, oy = origin
+        win_h, win_w = canvas.shape[:2]
+        bx0, by0, bx1, by1 = box or (0, 0, scene["width"], scene["height"])
+        x0, y0 = max(bx0, ox), max(by0, oy)
+        x1, y1 = min(bx1, ox + win_w), min(by1, oy + win_h)
+        if x1 <= x0 or y1 <= y0:
+            return
+        h, w = y1 - y0, x1 - x0
+        compositor = AlphaCompositor.for_thread()
+        layer_canvas = compositor._scratch("blur_canvas", (h, w, 4), np.uint8)
+        layer_mask = compositor._scratch("blur_mask", (h, w), np.uint8)
+        acc = compositor._scratch("blur_acc", (h, w, 4), np.float32)
+        acc.fill(0)
+        for frame, sub in samples:
+            layer_canvas.fill(0)
+            layer_mask.fill(0)
+            # Over a transparent canvas the compositor leaves color premultiplied by alpha * opacity
+            cls._render_layer(scene, frame, sub, layer_canvas, layer_mask, (x0, y0))
+            np.add(acc, layer_canvas, out=acc)
+
+        t0 = perf_counter()
+        alpha = acc[:, :, 3]
+        unpremultiply = np.divide(np.float32(255.0), alpha, out=np.zeros_like(alpha), where=alpha > 0)
+        np.multiply(acc[:, :, :3], unpremultiply[:, :, None], out=acc[:, :, :3])
+        acc[:, :, 3] *= np.float32(1.0 / len(samples))
+        blurred = compositor._scratch("blur_out", (h, w, 4), np.uint8)
+        np.clip(acc + np.float32(0.5), 0, 255, out=acc)
+        np.copyto(blurred, acc, casting="unsafe")
+        cls._composite_at(canvas, mask_canvas if data["is_foreground"] else None, blurred, x0, y0, 1.0, origin)
+        profiler = scene["runtime"]["profiler"]
+        if profiler.enabled:
+            profiler.add("motion_blur", perf_counter() - t0, layer=data["index"])
+
+    @staticmethod
+    def _scene_geometry(
+        scene: Dict[str, Any],
+        cam_values: Dict[str, List[float]],
+        layer_values: List[Dict[str, List[float]]]
+    ) -> Dict[str, np.ndarray]:
+        """
+        Camera and layer geometry for every frame of a range in one batch: ``z_depth`` (frames x layers,
+        view-space depth of each layer's position, for sorting), ``mvp`` (frames x layers x 4 x 4) and
+        ``corners`` (frames x layers x 4 x 2, each layer's sprite corners projected to the canvas).
+        """
+        cam = {p: np.asarray(v, dtype=np.float64) for p, v in cam_values.items()}
+        n_frames = len(cam["cam_yaw"])
+        if not layer_values:
+            return {"z_depth": np.zeros((n_frames, 0)), "mvp": np.zeros((n_frames, 0, 4, 4)), "corners": np.zeros((n_frames, 0, 4, 2), np.float32)}
+        view = Transform3D.build_view_matrix_batch(
+            cam["cam_pos_x"], cam["cam_pos_y"], cam["cam_pos_z"], cam["cam_yaw"], cam["cam_pitch"], cam["cam_roll"]
+        )
+        vp = Transform3D.build_projection_matrix_batch(cam["cam_fov"], scene["aspect"]) @ view
+        # Model matrix parameters in build_model_matrix order, stacked to frames x layers
+        props = {p: np.stack([np.asarray(values[p], dtype=np.float64) for values in layer_values], axis=1) for p in (
+            "x", "y", "z", "rotationX", "rotationY", "rotationZ", "scaleX", "scaleY", "scaleZ", "anchorX", "anchorY"
+        )}
+        mvp = vp[:, None] @ Transform3D.build_model_matrix_batch(*props.values())
+        sizes = np.array([layer["sprite"].shape[:2] for layer in scene["layers"]], dtype=np.float64)
+        return {
+            "z_depth": Transform3D.get_layer_z_depth_batch(props["x"], props["y"], props["z"], view[:, None]),
+            "mvp": mvp,
+            "corners": Transform3D.project_corners_batch(sizes[:, 1], sizes[:, 0], mvp, scene["width"], scene["height"]),
+        }
+
+    @classmethod
+    def _resolve_frame(cls, scene: Dict[str, Any], i: int) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Camera state and depth-sorted (far to near) per-layer render data for frame ``i`` of the range."""
+        camera_active = scene["camera_active"]
+        pano_enabled = scene["pano_enabled"]
+        cam_values = scene["cam_values"]
+
+        geometry = scene["geometry"]
+
+        # Camera parameters (使用 _final 变量作为默认值)
+        cam_yaw_t = cam_values["cam_yaw"][i]
+        cam_pitch_t = cam_values["cam_pitch"][i]
+        cam_roll_t = cam_values["cam_roll"][i]
+        cam_fov_t = cam_values["cam_fov"][i]
+        cam_pos_x_t = cam_values["cam_pos_x"][i]
+        cam_pos_y_t = cam_values["cam_pos_y"][i]
+        cam_pos_z_t = cam_values["cam_pos_z"][i]
+
+        frame = {
+            "cam_yaw": cam_yaw_t, "cam_pitch": cam_pitch_t, "cam_roll": cam_roll_t, "cam_fov": cam_fov_t,
+            "cam_pos_x": cam_pos_x_t, "cam_pos_y": cam_pos_y_t, "cam_pos_z": cam_pos_z_t,
+        }
+
+        # Collect layer data with Z-depth for sorting
+        profiler = scene["runtime"]["profiler"]
+        t0 = perf_counter()
+        layer_render_data = []
+        for index, (layer, values) in enumerate(zip(scene["layers"], scene["layer_values"])):
+            is_foreground = layer["type"] == "foreground"
+            is_pano_bg = pano_enabled and not is_foreground
+            is_3d = layer.get("is3D", False)
+
+            # Animated properties (precomputed for the whole range)
+            x, y, z = values["x"][i], values["y"][i], values["z"][i]
+
+            # Z-depth for sorting (view-space depths are precomputed with the MVPs)
+            z_depth = float(geometry["z_depth"][i, index]) if (is_3d or camera_active) else -z
+
+            layer_render_data.append({
+                "layer": layer,
+                "index": index,
+                "x": x, "y": y, "z": z,
+                "rot_x": values["rotationX"][i], "rot_y": values["rotationY"][i], "rot_z": values["rotationZ"][i],
+                "scale_x": values["scaleX"][i], "scale_y": values["scaleY"][i], "scale_z": values["scaleZ"][i],
+                "anchor_x": values["anchorX"][i], "anchor_y": values["anchorY"][i],
+                "opacity": values["opacity"][i],
+                # Legacy 2D properties
+                "scale_2d": values["scale"][i], "rotation_2d": values["rotation"][i],
+                "is_3d": is_3d, "is_foreground": is_foreground, "is_pano_bg": is_pano_bg,
+                "z_depth": z_depth, "mvp": geometry["mvp"][i, index], "corners": geometry["corners"][i, index],
+            })
+            layer_render_data[-1]["path"] = cls._render_path(scene, layer_render_data[-1])
+
+        # Sort by Z-depth (far to near, higher z_depth = farther)
+        layer_render_data.sort(key=lambda d: d["z_depth"], reverse=True)
+        if profiler.enabled:
+            profiler.add("sort", perf_counter() - t0)
+        return frame, layer_render_data
+
+    @staticmethod
+    def _covers_canvas(stage_inv: np.ndarray, stage_size: Tuple[int, int], width: int, height: int) -> bool:
+        """
+        True when every canvas pixel samples the interior of the stage through ``stage_inv`` (canvas to
+        stage, see ``_layer_inverse_map``), one texel clear of its edge so no bilinear tap is transparent.
+        """
+        corners = np.array([[0, 0, 1], [width - 1, 0, 1], [width - 1, height - 1, 1], [0, height - 1, 1]], dtype=np.float64)
+        proj = corners @ stage_inv.T
+        w = proj[:, 2]
+        # The canvas rectangle maps to a convex quad only if it does not cross the line at infinity
+        if not (np.all(w > 1e-9) or np.all(w < -1e-9)):
+            return False
+        pts = proj[:, :2] / w[:, None]
+        stage_w, stage_h = stage_size
+        return bool(np.all(pts >= 1.0) and np.all(pts[:, 0] <= stage_w - 2) and np.all(pts[:, 1] <= stage_h - 2))
+
+    @classmethod
+    def _cull_layers(
+        cls,
+        scene: Dict[str, Any],
+        frame: Dict[str, Any],
+        stack: List[Dict[str, Any]],
+        blurred: Dict[int, Any]
+    ) -> List[Dict[str, Any]]:
+        """
+        Drop the layers of a depth-sorted stack that cannot change the frame, before any pixel work:
+        zero opacity, nothing landing on the canvas (off-screen or behind the camera), or hidden behind
+        a nearer layer that is opaque, at full opacity and covers the whole canvas. A background
+        occluder only hides backgrounds, since foreground layers behind it still add to the mask.
+        Motion-blurred layers (indices in ``blurred``) are culled by occlusion only and never occlude.
+        """
+        width, height = scene["width"], scene["height"]
+        fused = scene["layer_warp"] == "fused"
+        kept = []
+        hidden = None  # None, "background" or "all"
+        invisible = occluded = 0
+        for data in reversed(stack):
+            if hidden == "all" or (hidden == "background" and not data["is_foreground"]):
+                occluded += 1
+                continue
+            if data["index"] in blurred:
+                kept.append(data)
+                continue
+            opacity = data["opacity"]
+            layer = data["layer"]
+            if opacity <= 0:
+                invisible += 1
+                continue
+            if data["is_pano_bg"]:
+                covers = opacity >= 1.0 and layer["opaque"]
+            else:
+                kind, args = cls._layer_call(scene, frame, data)
+                img_h, img_w = layer["sprite"].shape[:2]
+                if kind == "3d":
+                    # Clip-space w of the four corners: entirely behind the near plane would project mirrored
+                    mvp, hw, hh = args["mvp"], img_w / 2, img_h / 2
+                    clip_w = mvp[3, 0] * np.array([-hw, hw, hw, -hw]) + mvp[3, 1] * np.array([-hh, -hh, hh, hh]) + mvp[3, 3]
+                    if np.all(clip_w <= _NEAR_PLANE):
+                        invisible += 1
+                        continue
+                geometry = cls._layer_inverse_map(kind, args, img_w, img_h, data["is_foreground"], width, height, fused)
+                if geometry is None:
+                    invisible += 1
+                    continue
+                # Legacy 2D rotation clips the rotated sprite to its unrotated box: never treated as covering
+                clipped = kind == "2d" and not fused and abs(args["rotation"]) > 0.1
+                covers = opacity == 1.0 and layer["opaque"] and not clipped and cls._covers_canvas(geometry[0], geometry[1], width, height)
+            kept.append(data)
+            if covers:
+                hidden = "all" if data["is_foreground"] else (hidden or "background")
+        if invisible or occluded:
+            runtime = scene["runtime"]
+            with runtime["cull_lock"]:
+                runtime["culled"]["invisible"] += invisible
+                runtime["culled"]["occluded"] += occluded
+        kept.reverse()
+        return kept
+
+    @staticmethod
+    def _static_run(scene: Dict[str, Any], layer_render_data: List[Dict[str, Any]]) -> int:
+        """Number of static layers at the bottom of a depth-sorted stack, the part a plate replaces."""
+        static_layers = scene["static_layers"]
+        n_static = 0
+        while n_static < len(layer_render_data) and static_layers[layer_render_data[n_static]["index"]]:
+            n_static += 1
+        return n_static
+
+    @classmethod
+    def _static_plate(
+        cls,
+        scene: Dict[str, Any],
+        frame: Dict[str, Any],
+        stack: List[Dict[str, Any]],
+        window: Optional[Tuple[int, int, int, int]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Flattened color + mask of a run of static layers, cached per stack order, covering the whole
+        frame or the tile rectangle ``window``. Valid for any frame because static layers do not change
+        within the range. ``_prepare_plates`` builds them before frames are dispatched, so render
+        threads only read the cache.
+        """
+        key = (tuple(data["index"] for data in stack), window)
+        plates = scene["runtime"]["plates"]
+        plate = plates.get(key)
+        if plate is None:
+            x0, y0, x1, y1 = window or (0, 0, scene["width"], scene["height"])
+            plate_canvas = np.zeros((y1 - y0, x1 - x0, 4), dtype=np.uint8)
+            plate_mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+            for data in cls._cull_layers(scene, frame, stack, {}):
+                cls._render_layer(scene, frame, data, plate_canvas, plate_mask, (x0, y0))
+            plate = plates.setdefault(key, (plate_canvas, plate_mask))
+        return plate
+
+    @classmethod
+    def _prepare_plates(cls, scene: Dict[str, Any], todo: List[int], halo: int) -> None:
+        """Build the static plates frames ``todo`` will use, ahead of the render threads."""
+        if not any(scene["static_layers"]):
+            return
+        windows: List[Optional[Tuple[int, int, int, int]]] = [None]
+        if scene["tile_size"]:
+            windows = [w for _, _, w in cls._tile_windows(scene["width"], scene["height"], scene["tile_size"], halo)]
+        for i in todo:
+            frame, layer_render_data = cls._resolve_frame(scene, i)
+            n_static = cls._static_run(scene, layer_render_data)
+            if n_static:
+                for window in windows:
+                    cls._static_plate(scene, frame, layer_render_data[:n_static], window)
+
+    @staticmethod
+    def _render_path(scene: Dict[str, Any], data: Dict[str, Any]) -> str:
+        """Name of the render path ``_draw_layer`` takes for a resolved layer (profiling label)."""
+        if data["is_pano_bg"]:
+            return "pano"
+        if scene["pano_enabled"] and data["is_foreground"]:
+            base = "pano_fg"
+        elif data["is_3d"]:
+            return "3d"
+        elif scene["camera_active"]:
+            base = "camera"
+        else:
+            base = "2d"
+        has_3d_rotation = abs(data["rot_x"]) > 0.1 or abs(data["rot_y"]) > 0.1 or abs(data["rot_z"]) > 0.1
+        return base + "_rot3d" if has_3d_rotation else base
+
+    @classmethod
+    def _render_layer(
+        cls,
+        scene: Dict[str, Any],
+        frame: Dict[str, Any],
+        data: Dict[str, Any],
+        canvas: np.ndarray,
+        mask_canvas: np.ndarray,
+        origin: Tuple[int, int] = (0, 0),
+        placement: Optional[Tuple[Any, ...]] = None
+    ) -> None:
+        """Render one resolved layer, splitting its time into warp and composite when profiling."""
+        profiler = scene["runtime"]["profiler"]
+        if not profiler.enabled:
+            cls._draw_layer(scene, frame, data, canvas, mask_canvas, origin, placement)
+            return
+        compositor = AlphaCompositor.for_thread()
+        composite_before = compositor.elapsed
+        t0 = perf_counter()
+        cls._draw_layer(scene, frame, data, canvas, mask_canvas, origin, placement)
+        elapsed = perf_counter() - t0
+        composite = compositor.elapsed - composite_before
+        profiler.add(f"warp:{data['path']}", elapsed - composite, layer=data["index"])
+        profiler.add("composite", composite, layer=data["index"])
+
+    @classmethod
+    def _draw_layer(
+        cls,
+        scene: Dict[str, Any],
+        frame: Dict[str, Any],
+        data: Dict[str, Any],
+        canvas: np.ndarray,
+        mask_canvas: np.ndarray,
+        origin: Tuple[int, int] = (0, 0),
+        placement: Optional[Tuple[Any, ...]] = None
+    ) -> None:
+        """
+        Draw one resolved layer into ``canvas``, the window of the frame whose top-left is frame pixel
+        ``origin``. ``placement`` (from ``_layer_placement``) is computed here unless passed in.
+        """
+        if placement is None:
+            placement = cls._layer_placement(scene, frame, data)
+            if placement is None:
+                return
+        width, height = scene["width"], scene["height"]
+        win_h, win_w = canvas.shape[:2]
+        ox, oy = origin
+        window = None if (win_w, win_h) == (width, height) else (ox, oy, ox + win_w, oy + win_h)
+        layer = data["layer"]
+        opacity = data["opacity"]
+        mask = mask_canvas if data["is_foreground"] else None
+
+        # Panorama background
+        if placement[0] == "pano":
+            src = placement[1]
+            map_x, map_y = cls._pano_map(scene, frame, src.shape[1], src.shape[0], window)
+            if opacity >= 1.0 and layer["opaque"]:
+                # An opaque layer at full opacity replaces the canvas outright: remap straight into it
+                cv2.remap(src, map_x, map_y, scene["interpolation"], dst=canvas, borderMode=cv2.BORDER_WRAP)
+            else:
+                compositor = AlphaCompositor.for_thread()
+                warped = cv2.remap(
+                    src, map_x, map_y, scene["interpolation"], borderMode=cv2.BORDER_WRAP,
+                    dst=compositor._scratch("pano", (win_h, win_w, 4), np.uint8)
+                )
+                compositor.composite(canvas, mask, warped, opacity)
+        elif placement[0] == "warp":
+            _, img_np, M = placement
+            try:
+                roi = cls._warp_perspective_roi(img_np, M, width, height, window, scene["interpolation"])
+            except cv2.error:
+                return
+            if roi is not None:
+                warped, x0, y0 = roi
+                cls._composite_at(canvas, mask, warped, x0, y0, opacity, origin)
+        else:
+            _, img_np, x, y = placement
+            cls._composite_at(canvas, mask, img_np, x, y, opacity, origin)
+
+    @classmethod
+    def _layer_placement(cls, scene: Dict[str, Any], frame: Dict[str, Any], data: Dict[str, Any]) -> Optional[Tuple[Any, ...]]:
+        """
+        Window-independent part of drawing a resolved layer: ``("pano", source)``, ``("warp", image, M)``
+        or ``("paste", image, x, y)`` in frame coordinates, or None when the layer is culled.
+        """
+        width, height = scene["width"], scene["height"]
+        kind, args = cls._layer_call(scene, frame, data)
+        layer = data["layer"]
+        img_np = layer["sprite"]
+        mips = layer["mips"] if scene["mipmaps"] else None
+        is_foreground = data["is_foreground"]
+
+        if kind == "pano":
+            return "pano", cls._pano_source(scene, layer, frame["cam_fov"])
+        if kind == "3d":
+            return cls._place_layer_3d(img_np, args["mvp"], width, height, mips, args["corners"])
+        if scene["layer_warp"] == "fused":
+            M = cls._layer_transform(kind, args, img_np.shape[1], img_np.shape[0], is_foreground, width, height)
+            return cls._place_layer_fused(img_np, M, pixel_centers=kind == "2d", mips=mips)
+        if kind == "2d_rot3d":
+            return cls._place_layer_2d_with_3d_rotation(
+                img_np, args["x"], args["y"], args["scale"],
+                args["rot_x"], args["rot_y"], args["rot_z"],
+                is_foreground, width, height,
+                perspective=args["perspective"], bg_mode=args["bg_mode"], mips=mips, interpolation=scene["interpolation"]
+            )
+        return cls._place_layer_2d(
+            img_np, args["x"], args["y"], args["scale"], args["rotation"],
+            is_foreground, width, height, args["bg_mode"], mips, scene["interpolation"]
+        )
+
+    @staticmethod
+    def _layer_call(scene: Dict[str, Any], frame: Dict[str, Any], data: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Render path (``pano``, ``3d``, ``2d_rot3d`` or ``2d``) and its geometric arguments for one
+        resolved layer, with pano/camera-only offsets applied. Shared by drawing, culling and motion blur.
+        """
+        width = scene["width"]
+        pano_enabled, camera_active = scene["pano_enabled"], scene["camera_active"]
+        cam_yaw_t, cam_pitch_t, cam_fov_t = frame["cam_yaw"], frame["cam_pitch"], frame["cam_fov"]
+        layer = data["layer"]
+        has_3d_rotation = abs(data["rot_x"]) > 0.1 or abs(data["rot_y"]) > 0.1 or abs(data["rot_z"]) > 0.1
+
+        # Panorama background
+        if data["is_pano_bg"]:
+            return "pano", {}
+        elif pano_enabled and data["is_foreground"]:
+            # Pano模式下前景图层使用2D渲染，但需要跟随摄像机旋转
+            x, y = data["x"], data["y"]
+
+            # 根据摄像机 yaw/pitch 计算前景偏移（与前端逻辑一致）
+            if cam_yaw_t != 0 or cam_pitch_t != 0:
+                yaw_rad = np.deg2rad(cam_yaw_t)
+                pitch_rad = np.deg2rad(cam_pitch_t)
+                fov_rad = np.deg2rad(max(1.0, min(179.0, cam_fov_t)))
+                fov_factor = np.tan(fov_rad / 2)
+                move_scale = width / (2 * fov_factor)
+                x -= np.tan(yaw_rad) * move_scale
+                y -= np.tan(pitch_rad) * move_scale
+            scale, bg_mode = data["scale_2d"], "fit"
+        elif data["is_3d"]:
+            # 真正的3D图层使用完整的MVP矩阵变换（整段帧范围预先批量计算）
+            return "3d", {"mvp": data["mvp"], "corners": data["corners"]}
+        elif camera_active:
+            # camera-only模式：使用与前端一致的简单变换
+            # 摄像机位置影响图层偏移（反向）
+            x = data["x"] - frame["cam_pos_x"]
+            y = data["y"] - frame["cam_pos_y"]
+
+            # 摄像机旋转影响图层位置
+            if cam_yaw_t != 0 or cam_pitch_t != 0:
+                yaw_rad = np.deg2rad(cam_yaw_t)
+                pitch_rad = np.deg2rad(cam_pitch_t)
+                fov_rad = np.deg2rad(max(1.0, min(179.0, cam_fov_t)))
+                fov_factor = np.tan(fov_rad / 2)
+                move_scale = width / (2 * fov_factor)
+                x += np.tan(yaw_rad) * move_scale
+                y += np.tan(pitch_rad) * move_scale
+
+            # 摄像机Z轴产生的缩放效果
+            camera_z_scale = max(0.1, min(10, 1000 / max(100, frame["cam_pos_z"] * scene["draft"])))
+            scale, bg_mode = data["scale_2d"] * camera_z_scale, layer["bg_mode"]
+        else:
+            # 2D rendering
+            x, y = data["x"], data["y"]
+            scale, bg_mode = data["scale_2d"], layer["bg_mode"]
+
+        # Check if has 3D rotation
+        if has_3d_rotation:
+            return "2d_rot3d", {
+                "x": x, "y": y, "scale": scale,
+                "rot_x": data["rot_x"], "rot_y": data["rot_y"], "rot_z": data["rot_z"], "bg_mode": bg_mode,
+                "perspective": 1000.0 / scene["draft"],
+            }
+        return "2d", {"x": x, "y": y, "scale": scale, "rotation": data["rotation_2d"], "bg_mode": bg_mode}
+
+    @staticmethod
+    def _layer_inverse_map(
+        kind: str,
+        args: Dict[str, Any],
+        img_w: int,
+        img_h: int,
+        is_foreground: bool,
+        width: int,
+        height: int,
+        fused: bool = False
+    ) -> Optional[Tuple[np.ndarray, Tuple[int, int], Tuple[int, int, int, int]]]:
+        """
+        Single-pass geometry of a non-panorama render path, or None when drawing would skip the layer:
+        the 3x3 map from canvas pixels to the path's intermediate resized image ("stage"), the stage
+        size, and the canvas rectangle the layer is drawn into. Culling and motion blur use it to
+        reason about a layer's footprint without drawing it.
+        With ``fused`` (``layer_warp = fused``) 2D layers use ``_layer_transform`` and the stage is the sprite.
+        """
+        if kind == "3d":
+            dst_corners = args["corners"]
+            if np.any(dst_corners < -width * 2) or np.any(dst_corners > width * 3):
+                return None
+            src_corners = np.array([[0, 0], [img_w, 0], [img_w, img_h], [0, img_h]], dtype=np.float32)
+            try:
+                M = cv2.getPerspectiveTransform(src_corners, dst_corners)
+            except cv2.error:
+                return None
+            bounds = AEAnimation._homography_bounds(img_w, img_h, M, width, height)
+            if bounds is None:
+                return None
+            return cv2.invert(M.astype(np.float64), flags=cv2.DECOMP_LU)[1], (img_w, img_h), bounds
+
+        if fused:
+            M = AEAnimation._layer_transform(kind, args, img_w, img_h, is_foreground, width, height)
+            bounds = AEAnimation._homography_bounds(img_w, img_h, M, width, height) if M is not None else None
+            if bounds is None:
+                return None
+            return cv2.invert(M, flags=cv2.DECOMP_LU)[1], (img_w, img_h), bounds
+
+        extent_w, extent_h = AEAnimation._layer_extent(
+            img_w, img_h, args["scale"], is_foreground, args["bg_mode"], width, height, rot3d=kind == "2d_rot3d"
+        )
+        new_w, new_h = max(1, int(extent_w)), max(1, int(extent_h))
+
+        if kind == "2d_rot3d":
+            src_pts, dst_pts = AEAnimation._rotation_quad(
+                new_w, new_h, args["x"], args["y"], args["rot_x"], args["rot_y"], args["rot_z"], args["perspective"], width, height
+            )
+            if np.any(dst_pts < -width * 2) or np.any(dst_pts > width * 3):
+                return None
+            try:
+                M = cv2.getPerspectiveTransform(src_pts, dst_pts)
+            except cv2.error:
+                return None
+            bounds = AEAnimation._homography_bounds(new_w, new_h, M, width, height)
+            if bounds is None:
+                return None
+            return cv2.invert(M.astype(np.float64), flags=cv2.DECOMP_LU)[1], (new_w, new_h), bounds
+
+        # Plain 2D: optional rotation about the resized image's center, clipped to its box, then pasted
+        M_inv = np.eye(3)
+        if abs(args["rotation"]) > 0.1:
+            rotation = np.vstack([cv2.getRotationMatrix2D((new_w // 2, new_h // 2), args["rotation"], 1.0), [0, 0, 1]])
+            M_inv = np.linalg.inv(rotation)
+        paste_x = int(width // 2 + args["x"] - new_w // 2)
+        paste_y = int(height // 2 + args["y"] - new_h // 2)
+        x0, y0 = max(0, paste_x), max(0, paste_y)
+        x1, y1 = min(paste_x + new_w, width), min(paste_y + new_h, height)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return M_inv @ np.array([[1, 0, -paste_x], [0, 1, -paste_y], [0, 0, 1]], dtype=np.float64), (new_w, new_h), (x0, y0, x1, y1)
+
+    @staticmethod
+    def _find_static_layers(
+        layers: List[Dict[str, Any]],
+        layer_values: List[Dict[str, List[Any]]],
+        cam_values: Dict[str, List[Any]],
+        camera_active: bool
+    ) -> List[bool]:
+        """
+        Layers that produce the same pixels on every frame of the range: all resolved properties
+        (keyframes and bezier path included) are constant, and the camera either holds still or
+        does not affect the layer's render path.
+        """
+        def constant(values: List[Any]) -> bool:
+            return not values or values.count(values[0]) == len(values)
+
+        camera_static = all(constant(v) for v in cam_values.values())
+        static = []
+        for layer, values in zip(layers, layer_values):
+            uses_camera = camera_active or layer.get("is3D", False)
+            static.append((camera_static or not uses_camera) and all(constant(v) for v in values.values()))
+        return static
+
+    @staticmethod
+    def _frame_fingerprint(scene: Dict[str, Any], i: int) -> Tuple[Any, ...]:
+        """Everything frame ``i`` depends on: camera parameters and every layer's resolved properties."""
+        cam_values = scene["cam_values"]
+        key = [values[i] for values in cam_values.values()]
+        for values in scene["layer_values"]:
+            key.extend(values[prop][i] for prop in _LAYER_ANIMATED_PROPS)
+        motion = scene["motion"]
+        if motion is not None:
+            # Blurred frames also depend on every sub-frame state inside the shutter
+            key.extend(tuple(values[i].tolist()) for values in motion["cam_values"].values())
+            for values in motion["layer_values"]:
+                key.extend(tuple(values[prop][i].tolist()) for prop in _LAYER_ANIMATED_PROPS)
+        return tuple(key)
+
+    @classmethod
+    def _frame_cache_keys(cls, scene: Dict[str, Any], n_frames: int, mask_expansion: int, mask_feather: int) -> List[str]:
+        """
+        Disk cache key per frame: the frame fingerprint plus everything constant across the range
+        (resolution, modes, mask settings, and each layer's image/mask content hash and static options).
+        """
+        shared = [
+            _FRAME_CACHE_VERSION, scene["width"], scene["height"], scene["pano_enabled"], scene["camera_active"],
+            scene["tile_size"], scene["mipmaps"], scene["layer_warp"], scene["draft"], mask_expansion, mask_feather,
+            (scene["motion"]["shutter"], scene["motion"]["samples"]) if scene["motion"] else None,
+        ]
+        for layer in scene["layers"]:
+            shared.append((layer["image_key"], layer["mask_key"], layer["type"], layer["bg_mode"], bool(layer.get("is3D", False))))
+        base = hashlib.blake2b(repr(shared).encode(), digest_size=16)
+        keys = []
+        for i in range(n_frames):
+            h = base.copy()
+            h.update(repr(cls._frame_fingerprint(scene, i)).encode())
+            keys.append(h.hexdigest())
+        return keys
+
+    @staticmethod
+    def _postprocess_mask(mask_canvas: np.ndarray, mask_expansion: int, mask_feather: int) -> np.ndarray:
+        """
+        Grow/shrink then feather a uint8 mask, or a stacked ``(N, H, W)`` mask volume in one call.
+        Expansion by r equals r iterations of a 3x3 dilate/erode exactly; large radii use a log-step
+        running extreme, so cost stays flat up to r = 255. Feathering is the legacy GaussianBlur up to
+        ``mask_feather`` 7 and three sigma-matched box blurs above (within 6 levels, typically 3).
+        """
+        r = abs(mask_expansion)
+        if r:
+            if r > _MASK_MORPH_DIRECT_MAX or mask_canvas.ndim > 2:
+                mask_canvas = _window_extreme(_window_extreme(mask_canvas, r, -1, mask_expansion > 0), r, -2, mask_expansion > 0)
+            else:
+                kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2 * r + 1, 2 * r + 1))
+                op = cv2.dilate if mask_expansion > 0 else cv2.erode
+                mask_canvas = op(mask_canvas, kernel)
+        if mask_feather > 0:
+            if mask_canvas.ndim > 2:
+                return np.stack([AEAnimation._postprocess_mask(m, 0, mask_feather) for m in mask_canvas])
+            ksize = max(3, mask_feather * 2 + 1)
+            if mask_feather <= _MASK_FEATHER_EXACT_MAX:
+                mask_canvas = cv2.GaussianBlur(mask_canvas, (ksize, ksize), 0)
+            else:
+                for size in _feather_box_sizes(ksize):
+                    mask_canvas = cv2.blur(mask_canvas, (size, size), borderType=cv2.BORDER_REFLECT_101)
+        return mask_canvas
+
+    @staticmethod
+    def _mask_halo(mask_expansion: int, mask_feather: int) -> int:
+        """How far ``_postprocess_mask`` reads around each pixel: the context a tile must render beyond its edges."""
+        halo = abs(mask_expansion)
+        if mask_feather > 0:
+            ksize = max(3, mask_feather * 2 + 1)
+            if mask_feather <= _MASK_FEATHER_EXACT_MAX:
+                halo += ksize // 2
+            else:
+                halo += sum(size // 2 for size in _feather_box_sizes(ksize))
+        return halo
+
+    @staticmethod
+    def _resolve_workers(render_threads: int, n_frames: int) -> int:
+        """Worker threads for a render: 0 means one per CPU core, never more than there are frames."""
+        workers = render_threads if render_threads > 0 else (os.cpu_count() or 1)
+        return max(1, min(workers, n_frames))
+
+    @classmethod
+    def _render_range(
+        cls,
+        scene: Dict[str, Any],
+        lo: int,
+        hi: int,
+        frames_out: np.ndarray,
+        masks_out: np.ndarray,
+        mask_expansion: int,
+        mask_feather: int,
+        workers: int = 1
+    ) -> None:
+        """Render scene frames ``[lo, hi)`` into the matching slots of preallocated outputs."""
+        height, width = scene["height"], scene["width"]
+        local = threading.local()
+        scale = np.float32(255.0)
+        profiler = scene["runtime"]["profiler"]
+
+        def render(i: int) -> None:
+            if scene["tile_size"]:
+                t0 = perf_counter()
+                tiles = getattr(local, "tiles", None)
+                if tiles is None:
+                    tiles = local.tiles = []
+                cls._render_frame_tiled(scene, i, frames_out[i], masks_out[i], mask_expansion, mask_feather, tiles)
+                if profiler.enabled:
+                    profiler.add("frame", perf_counter() - t0, frame=scene["start_frame"] + i * scene["frame_step"])
+                return
+            # uint8 canvases are reused by each worker thread across its frames
+            buffers = getattr(local, "buffers", None)
+            if buffers is None:
+                buffers = local.buffers = (
+                    np.empty((height, width, 4), dtype=np.uint8),
+                    np.empty((height, width), dtype=np.uint8),
+                )
+            t0 = perf_counter()
+            canvas, mask_canvas = cls._render_frame(scene, i, *buffers)
+            t1 = perf_counter()
+            mask_canvas = cls._postprocess_mask(mask_canvas, mask_expansion, mask_feather)
+            t2 = perf_counter()
+            # uint8 -> float32 / 255 written directly into the output slice (buffered, no full-frame temporaries)
+            np.divide(canvas[:, :, :3], scale, out=frames_out[i], dtype=np.float32)
+            np.divide(mask_canvas, scale, out=masks_out[i], dtype=np.float32)
+            if profiler.enabled:
+                frame = scene["start_frame"] + i * scene["frame_step"]
+                t3 = perf_counter()
+                profiler.add("render", t1 - t0)
+                profiler.add("mask", t2 - t1)
+                profiler.add("convert", t3 - t2)
+                profiler.add("frame", t3 - t0, frame=frame)
+
+        # Hold frames: a frame whose resolved state matches an earlier one reuses its finished pixels.
+        # Frames already filled from the disk cache are sources too, but are not rendered again.
+        cached = scene["cached_frames"]
+        first_seen: Dict[Tuple[Any, ...], int] = {}
+        todo: List[int] = []
+        holds: List[Tuple[int, int]] = []
+        for i in range(lo, hi):
+            src = first_seen.setdefault(cls._frame_fingerprint(scene, i), i)
+            if src == i:
+                if i not in cached:
+                    todo.append(i)
+            elif i not in cached:
+                holds.append((i, src))
+
+        cls._prepare_plates(scene, todo, cls._mask_halo(mask_expansion, mask_feather))
+        if workers > 1 and len(todo) > 1:
+            # Frame threads replace OpenCV's internal pool rather than oversubscribing the cores with it
+            cv2_threads = cv2.getNumThreads()
+            cv2.setNumThreads(1)
+            try:
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ae-render") as pool:
+                    list(pool.map(render, todo))
+            finally:
+                cv2.setNumThreads(cv2_threads)
+        else:
+            for i in todo:
+                render(i)
+
+        for i, src in holds:
+            frames_out[i] = frames_out[src]
+            masks_out[i] = masks_out[src]
+        if holds:
+            logging.debug(f"[AE] Hold frames: rendered {len(todo)}, reused {len(holds)}")
+        cls._report_culled(scene)
+
+    @staticmethod
+    def _report_culled(scene: Dict[str, Any]) -> None:
+        culled = scene["runtime"]["culled"]
+        if culled["invisible"] or culled["occluded"]:
+            logging.debug(f"[AE] Culled layers: {culled['invisible']} invisible, {culled['occluded']} occluded")
+
+    @staticmethod
+    def _expand_draft(
+        frames: torch.Tensor,
+        masks: torch.Tensor,
+        width: int,
+        height: int,
+        frame_step: int,
+        n_out: int
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Draft output at the declared size and frame count: each rendered frame is upscaled (bilinear)
+        and held for the ``frame_step`` output frames it stands for.
+        """
+        out_frames = torch.empty((n_out, height, width, 3), dtype=torch.float32)
+        out_masks = torch.empty((n_out, height, width), dtype=torch.float32)
+        resize = frames.shape[1:3] != (height, width)
+        for k in range(frames.shape[0]):
+            lo, hi = k * frame_step, min((k + 1) * frame_step, n_out)
+            for src, dst in ((frames[k], out_frames[lo]), (masks[k], out_masks[lo])):
+                if resize:
+                    dst.numpy()[...] = cv2.resize(src.numpy(), (width, height), interpolation=cv2.INTER_LINEAR)
+                else:
+                    dst.copy_(src)
+            out_frames[lo + 1:hi] = out_frames[lo]
+            out_masks[lo + 1:hi] = out_masks[lo]
+        return out_frames, out_masks
 
     @classmethod
     def execute(
@@ -610,8 +2471,21 @@ class AEAnimation(io.ComfyNode):
         layers_keyframes: str = "",
         start_frame: int = 0,
         end_frame: int = -1,
+        render_threads: int = 0,
+        render_tile_size: int = 0,
+        frame_cache: int = 0,
+        path_timing: str = "uniform_segments",
+        motion_blur: float = 0.0,
+        motion_blur_samples: int = 16,
+        mipmaps: int = 0,
+        layer_warp: str = "legacy",
+        draft_resolution: str = "full",
+        draft_frame_step: int = 1,
     ) -> io.NodeOutput:
+        profiler = RenderProfiler.for_run()
+        t_start = perf_counter()
         parsed = _parse_layers(layers_keyframes)
+        t_parsed = perf_counter()
         layers_data = parsed["layers"]
         project_kf = parsed["project_keyframes"]
         project_data = parsed.get("project", {})
@@ -628,6 +2502,7 @@ class AEAnimation(io.ComfyNode):
         cam_pos_x_final = float(project_data.get("cam_pos_x", cam_pos_x) or 0)
         cam_pos_y_final = float(project_data.get("cam_pos_y", cam_pos_y) or 0)
         cam_pos_z_final = float(project_data.get("cam_pos_z", cam_pos_z) or 1000)
+        path_timing_final = project_data.get("path_timing") or path_timing
         
         pano_enabled = bool(pano_enable_final)
         camera_active = bool(cam_enable_final) or pano_enabled
@@ -636,241 +2511,142 @@ class AEAnimation(io.ComfyNode):
         if end_frame == -1 or end_frame > total_frames:
             end_frame = total_frames
 
-        layers = cls._decode_layers(layers_data)
+        # Draft (proxy) render: a reduced canvas and every k-th frame, expanded back to the declared output
+        draft = _DRAFT_DIVISORS.get(draft_resolution, 1)
+        frame_step = max(1, draft_frame_step)
+        render_w, render_h = max(1, round(width / draft)), max(1, round(height / draft))
+        if draft > 1:
+            mask_expansion, mask_feather = round(mask_expansion / draft), 0
+
+        layers = cls._prepare_layers(cls._decode_layers(layers_data), draft)
+        t_decoded = perf_counter()
+        # Tiles at least as large as the frame are a plain full-frame render
+        tile_size = render_tile_size if 0 < render_tile_size < max(render_w, render_h) else 0
         print(f"[AE] Render: {width}x{height}, frames {start_frame}-{end_frame}/{total_frames}, {len(layers)} layers")
+        if draft > 1 or frame_step > 1:
+            logging.info(f"[AE] Draft: {render_w}x{render_h} ({draft_resolution}), every {frame_step} frame(s)")
         print(f"[AE] Camera: pano_enabled={pano_enabled}, camera_active={camera_active}, yaw={cam_yaw_final}, pitch={cam_pitch_final}, fov={cam_fov_final}")
 
-        def interp_kf(prop: str, default: float, t: float) -> float:
-            arr = project_kf.get(prop) if isinstance(project_kf, dict) else None
-            if not arr:
-                return default
-            try:
-                arr_sorted = sorted(arr, key=lambda k: k.get("time", 0))
-                if t <= arr_sorted[0]["time"]:
-                    return arr_sorted[0]["value"]
-                if t >= arr_sorted[-1]["time"]:
-                    return arr_sorted[-1]["value"]
-                for i in range(len(arr_sorted) - 1):
-                    t1, t2 = arr_sorted[i]["time"], arr_sorted[i + 1]["time"]
-                    if t1 <= t <= t2:
-                        alpha = (t - t1) / (t2 - t1) if t2 > t1 else 0
-                        return arr_sorted[i]["value"] + (arr_sorted[i + 1]["value"] - arr_sorted[i]["value"]) * alpha
-            except Exception:
-                pass
-            return default
-
-        frames: List[torch.Tensor] = []
-        masks: List[torch.Tensor] = []
-        pano_cache: Optional[Tuple[np.ndarray, np.ndarray, float, float, float, float]] = None
-
-        for frame_idx in range(start_frame, end_frame):
-            time = frame_idx / max(fps, 1)
-
-            # Camera parameters (使用 _final 变量作为默认值)
-            cam_yaw_t = interp_kf("cam_yaw", cam_yaw_final, time)
-            cam_pitch_t = interp_kf("cam_pitch", cam_pitch_final, time)
-            cam_roll_t = interp_kf("cam_roll", cam_roll_final, time)
-            cam_fov_t = interp_kf("cam_fov", cam_fov_final, time)
-            cam_pos_x_t = interp_kf("cam_pos_x", cam_pos_x_final, time)
-            cam_pos_y_t = interp_kf("cam_pos_y", cam_pos_y_final, time)
-            cam_pos_z_t = interp_kf("cam_pos_z", cam_pos_z_final, time)
-
-            # Build camera matrices
-            view_matrix = Transform3D.build_view_matrix(cam_pos_x_t, cam_pos_y_t, cam_pos_z_t, cam_yaw_t, cam_pitch_t, cam_roll_t)
-            proj_matrix = Transform3D.build_projection_matrix(cam_fov_t, aspect)
-            vp_matrix = proj_matrix @ view_matrix
-
-            canvas = np.zeros((height, width, 4), dtype=np.uint8)
-            mask_canvas = np.zeros((height, width), dtype=np.uint8)
-
-            # Collect layer data with Z-depth for sorting
-            layer_render_data = []
-            for layer in layers:
-                kf = layer.get("keyframes", {})
-                is_foreground = layer["type"] == "foreground"
-                is_pano_bg = pano_enabled and not is_foreground
-                is_3d = layer.get("is3D", False)
-
-                # Get animated properties
-                x = cls._get_value(kf, "x", time, layer["x"])
-                y = cls._get_value(kf, "y", time, layer["y"])
-                z = cls._get_value(kf, "z", time, layer["z"])
-
+        # Compile keyframes once and evaluate every property for the whole frame range
+        paths = [BezierPath.compile(layer.get("bezierPath")) if layer.get("usePathAnimation", False) else None for layer in layers]
+
+        def evaluate(t: np.ndarray) -> Tuple[Dict[str, List[Any]], List[Dict[str, List[Any]]]]:
+            cam = _evaluate_tracks(project_kf, {
+                "cam_yaw": cam_yaw_final,
+                "cam_pitch": cam_pitch_final,
+                "cam_roll": cam_roll_final,
+                "cam_fov": cam_fov_final,
+                "cam_pos_x": cam_pos_x_final,
+                "cam_pos_y": cam_pos_y_final,
+                "cam_pos_z": cam_pos_z_final,
+            }, t)
+            per_layer = []
+            for layer, path in zip(layers, paths):
+                values = _evaluate_tracks(layer.get("keyframes"), {p: layer[p] for p in _LAYER_ANIMATED_PROPS}, t)
                 # Bezier path override (only if usePathAnimation is enabled)
-                use_path_animation = layer.get("usePathAnimation", False)
-                bezier_path = layer.get("bezierPath")
-                if use_path_animation and bezier_path and len(bezier_path) >= 2:
-                    pos = cls._calculate_bezier_pos(bezier_path, time, duration)
-                    if pos:
-                        x, y = pos
-
-                # 3D properties
-                rot_x = cls._get_value(kf, "rotationX", time, layer["rotationX"])
-                rot_y = cls._get_value(kf, "rotationY", time, layer["rotationY"])
-                rot_z = cls._get_value(kf, "rotationZ", time, layer["rotationZ"])
-                scale_x = cls._get_value(kf, "scaleX", time, layer["scaleX"])
-                scale_y = cls._get_value(kf, "scaleY", time, layer["scaleY"])
-                scale_z = cls._get_value(kf, "scaleZ", time, layer["scaleZ"])
-                anchor_x = cls._get_value(kf, "anchorX", time, layer["anchorX"])
-                anchor_y = cls._get_value(kf, "anchorY", time, layer["anchorY"])
-                opacity = cls._get_value(kf, "opacity", time, layer["opacity"])
-
-                # Legacy 2D properties
-                scale_2d = cls._get_value(kf, "scale", time, layer["scale"])
-                rotation_2d = cls._get_value(kf, "rotation", time, layer["rotation"])
-
-                # Calculate Z-depth for sorting
-                z_depth = Transform3D.get_layer_z_depth(x, y, z, view_matrix) if (is_3d or camera_active) else -z
-
-                layer_render_data.append({
-                    "layer": layer,
-                    "x": x, "y": y, "z": z,
-                    "rot_x": rot_x, "rot_y": rot_y, "rot_z": rot_z,
-                    "scale_x": scale_x, "scale_y": scale_y, "scale_z": scale_z,
-                    "anchor_x": anchor_x, "anchor_y": anchor_y,
-                    "opacity": opacity,
-                    "scale_2d": scale_2d, "rotation_2d": rotation_2d,
-                    "is_3d": is_3d, "is_foreground": is_foreground, "is_pano_bg": is_pano_bg,
-                    "z_depth": z_depth,
-                })
-
-            # Sort by Z-depth (far to near, higher z_depth = farther)
-            layer_render_data.sort(key=lambda d: d["z_depth"], reverse=True)
-
-            # Render layers
-            for data in layer_render_data:
-                layer = data["layer"]
-                img_np = layer["data"].copy()
-                is_foreground = data["is_foreground"]
-                is_pano_bg = data["is_pano_bg"]
-                is_3d = data["is_3d"]
-                opacity = data["opacity"]
-
-                # Apply custom mask
-                if is_foreground and layer.get("customMask"):
-                    try:
-                        mask_b64 = layer["customMask"].split(",")[1]
-                        mask_img = Image.open(python_io.BytesIO(base64.b64decode(mask_b64))).convert("RGBA")
-                        mask_np = np.array(mask_img)
-                        if mask_np.shape[:2] != img_np.shape[:2]:
-                            mask_np = cv2.resize(mask_np, (img_np.shape[1], img_np.shape[0]), interpolation=cv2.INTER_LINEAR)
-                        img_np[:, :, 3] = (img_np[:, :, 3].astype(np.float32) * mask_np[:, :, 3] / 255.0).astype(np.uint8)
-                    except Exception as e:
-                        print(f"[AE] Custom mask error: {e}")
-
-                # Panorama background
-                if is_pano_bg:
-                    cache_key = (cam_fov_t, cam_yaw_t, cam_pitch_t, cam_roll_t)
-                    if pano_cache is None or pano_cache[2:] != cache_key:
-                        map_x, map_y = cls._build_pano_map(width, height, cam_fov_t, cam_yaw_t, cam_pitch_t, cam_roll_t, img_np.shape[1], img_np.shape[0])
-                        pano_cache = (map_x, map_y, *cache_key)
-                    img_np = cv2.remap(img_np, pano_cache[0], pano_cache[1], cv2.INTER_LINEAR, borderMode=cv2.BORDER_WRAP)
-                    cls._render_layer_2d(img_np, 0, 0, 1.0, 0, canvas, mask_canvas, opacity, is_foreground, width, height, "fit")
-                elif pano_enabled and is_foreground:
-                    # Pano模式下前景图层使用2D渲染，但需要跟随摄像机旋转
-                    fg_x = data["x"]
-                    fg_y = data["y"]
-                    
-                    # 根据摄像机 yaw/pitch 计算前景偏移（与前端逻辑一致）
-                    if cam_yaw_t != 0 or cam_pitch_t != 0:
-                        yaw_rad = np.deg2rad(cam_yaw_t)
-                        pitch_rad = np.deg2rad(cam_pitch_t)
-                        fov_rad = np.deg2rad(max(1.0, min(179.0, cam_fov_t)))
-                        fov_factor = np.tan(fov_rad / 2)
-                        move_scale = width / (2 * fov_factor)
-                        fg_x -= np.tan(yaw_rad) * move_scale
-                        fg_y -= np.tan(pitch_rad) * move_scale
-                    
-                    # Check if has 3D rotation
-                    has_3d_rotation = abs(data["rot_x"]) > 0.1 or abs(data["rot_y"]) > 0.1 or abs(data["rot_z"]) > 0.1
-                    if has_3d_rotation:
-                        cls._render_layer_2d_with_3d_rotation(
-                            img_np, fg_x, fg_y, data["scale_2d"],
-                            data["rot_x"], data["rot_y"], data["rot_z"],
-                            canvas, mask_canvas, opacity, is_foreground, width, height,
-                            perspective=1000.0, bg_mode="fit"
-                        )
-                    else:
-                        cls._render_layer_2d(
-                            img_np, fg_x, fg_y, data["scale_2d"], data["rotation_2d"],
-                            canvas, mask_canvas, opacity, is_foreground, width, height, "fit"
-                        )
-                elif is_3d:
-                    # 真正的3D图层使用完整的MVP矩阵变换
-                    model_matrix = Transform3D.build_model_matrix(
-                        data["x"], data["y"], data["z"],
-                        data["rot_x"], data["rot_y"], data["rot_z"],
-                        data["scale_x"], data["scale_y"], data["scale_z"],
-                        data["anchor_x"], data["anchor_y"]
-                    )
-                    mvp = vp_matrix @ model_matrix
-                    cls._render_layer_3d(img_np, mvp, canvas, mask_canvas, opacity, is_foreground, width, height)
-                elif camera_active:
-                    # camera-only模式：使用与前端一致的简单变换
-                    # 摄像机位置影响图层偏移（反向）
-                    layer_x = data["x"] - cam_pos_x_t
-                    layer_y = data["y"] - cam_pos_y_t
-                    
-                    # 摄像机旋转影响图层位置
-                    if cam_yaw_t != 0 or cam_pitch_t != 0:
-                        yaw_rad = np.deg2rad(cam_yaw_t)
-                        pitch_rad = np.deg2rad(cam_pitch_t)
-                        fov_rad = np.deg2rad(max(1.0, min(179.0, cam_fov_t)))
-                        fov_factor = np.tan(fov_rad / 2)
-                        move_scale = width / (2 * fov_factor)
-                        layer_x += np.tan(yaw_rad) * move_scale
-                        layer_y += np.tan(pitch_rad) * move_scale
-                    
-                    # 摄像机Z轴产生的缩放效果
-                    camera_z_scale = max(0.1, min(10, 1000 / max(100, cam_pos_z_t)))
-                    final_scale = data["scale_2d"] * camera_z_scale
-                    
-                    # 检查是否有3D旋转
-                    has_3d_rotation = abs(data["rot_x"]) > 0.1 or abs(data["rot_y"]) > 0.1 or abs(data["rot_z"]) > 0.1
-                    if has_3d_rotation:
-                        cls._render_layer_2d_with_3d_rotation(
-                            img_np, layer_x, layer_y, final_scale,
-                            data["rot_x"], data["rot_y"], data["rot_z"],
-                            canvas, mask_canvas, opacity, is_foreground, width, height,
-                            perspective=1000.0, bg_mode=layer["bg_mode"]
-                        )
-                    else:
-                        cls._render_layer_2d(
-                            img_np, layer_x, layer_y, final_scale, data["rotation_2d"],
-                            canvas, mask_canvas, opacity, is_foreground, width, height, layer["bg_mode"]
-                        )
-                else:
-                    # 2D rendering - check if has 3D rotation
-                    has_3d_rotation = abs(data["rot_x"]) > 0.1 or abs(data["rot_y"]) > 0.1 or abs(data["rot_z"]) > 0.1
-                    if has_3d_rotation:
-                        cls._render_layer_2d_with_3d_rotation(
-                            img_np, data["x"], data["y"], data["scale_2d"],
-                            data["rot_x"], data["rot_y"], data["rot_z"],
-                            canvas, mask_canvas, opacity, is_foreground, width, height,
-                            perspective=1000.0, bg_mode=layer["bg_mode"]
-                        )
-                    else:
-                        cls._render_layer_2d(
-                            img_np, data["x"], data["y"], data["scale_2d"], data["rotation_2d"],
-                            canvas, mask_canvas, opacity, is_foreground, width, height, layer["bg_mode"]
-                        )
-
-            # Post-processing
-            if mask_expansion != 0:
-                kernel = np.ones((3, 3), np.uint8)
-                op = cv2.dilate if mask_expansion > 0 else cv2.erode
-                mask_canvas = op(mask_canvas, kernel, iterations=abs(mask_expansion))
-            if mask_feather > 0:
-                ksize = max(3, mask_feather * 2 + 1)
-                mask_canvas = cv2.GaussianBlur(mask_canvas, (ksize, ksize), 0)
-
-            frames.append(torch.from_numpy(canvas[:, :, :3].astype(np.float32) / 255.0))
-            masks.append(torch.from_numpy(mask_canvas.astype(np.float32) / 255.0))
+                if path is not None:
+                    t_norm = np.clip(t / duration, 0.0, 1.0) if duration > 0 else np.zeros_like(t)
+                    path_x, path_y = path.evaluate(t_norm, constant_speed=path_timing_final == "constant_speed")
+                    values["x"], values["y"] = path_x.tolist(), path_y.tolist()
+                per_layer.append(values)
+            if draft > 1:
+                # Scene units shrink with the canvas: positions, anchors and camera position (sprites are reduced too)
+                for prop in ("cam_pos_x", "cam_pos_y", "cam_pos_z"):
+                    cam[prop] = [v / draft for v in cam[prop]]
+                for values in per_layer:
+                    for prop in ("x", "y", "z", "anchorX", "anchorY"):
+                        values[prop] = [v / draft for v in values[prop]]
+            return cam, per_layer
+
+        times = np.arange(start_frame, end_frame, dtype=np.float64)[::frame_step] / max(fps, 1)
+        cam_values, layer_values = evaluate(times)
+        static_layers = cls._find_static_layers(layers, layer_values, cam_values, camera_active)
+
+        # Motion blur: every property at evenly spaced sub-frame times across a shutter centred on each frame
+        motion = None
+        if motion_blur > 0 and len(times):
+            n_sub = max(2, motion_blur_samples)
+            shutter = min(motion_blur, 720.0) / 360.0
+            offsets = ((np.arange(n_sub) + 0.5) / n_sub - 0.5) * shutter / max(fps, 1)
+            sub_cam, sub_layers = evaluate((times[:, None] + offsets).ravel())
+            # A layer that moves only between frame times is not static under blur
+            sub_static = cls._find_static_layers(layers, sub_layers, sub_cam, camera_active)
+            static_layers = [a and b for a, b in zip(static_layers, sub_static)]
+            motion = {
+                "shutter": shutter,
+                "samples": n_sub,
+                "cam_values": {p: np.asarray(v).reshape(-1, n_sub) for p, v in sub_cam.items()},
+                "layer_values": [{p: np.asarray(v).reshape(-1, n_sub) for p, v in values.items()} for values in sub_layers],
+            }
 
-        if not frames:
+        scene = {
+            "width": render_w,
+            "height": render_h,
+            "aspect": aspect,
+            "pano_enabled": pano_enabled,
+            "camera_active": camera_active,
+            "layers": layers,
+            "layer_values": layer_values,
+            "cam_values": cam_values,
+            "static_layers": static_layers,
+            "tile_size": tile_size,
+            "motion": motion,
+            "mipmaps": bool(mipmaps),
+            "layer_warp": layer_warp,
+            "draft": draft,
+            "interpolation": cv2.INTER_NEAREST if draft > 1 else cv2.INTER_LINEAR,
+            "cached_frames": frozenset(),
+            "start_frame": start_frame,
+            "frame_step": frame_step,
+            "runtime": _scene_runtime(profiler),
+        }
+        scene["geometry"] = cls._scene_geometry(scene, cam_values, layer_values)
+        if profiler.enabled:
+            profiler.add("parse", t_parsed - t_start)
+            profiler.add("decode", t_decoded - t_parsed)
+            profiler.add("keyframes", perf_counter() - t_decoded)
+
+        # Frames are independent once keyframes are evaluated; OpenCV releases the GIL while warping
+        n_frames = len(times)
+        if n_frames == 0:
             return io.NodeOutput(torch.zeros((1, 64, 64, 3)), torch.zeros((1, 64, 64)))
 
-        return io.NodeOutput(torch.stack(frames), torch.stack(masks))
+        # Outputs are allocated once; each frame converts straight into its slice
+        frames = torch.empty((n_frames, render_h, render_w, 3), dtype=torch.float32)
+        masks = torch.empty((n_frames, render_h, render_w), dtype=torch.float32)
+        cache_keys = cls._frame_cache_keys(scene, n_frames, mask_expansion, mask_feather) if frame_cache else None
+        if cache_keys:
+            t0 = perf_counter()
+            scene["cached_frames"] = frozenset(
+                i for i, key in enumerate(cache_keys) if _frame_cache.get(key, frames[i].numpy(), masks[i].numpy())
+            )
+            if profiler.enabled:
+                profiler.add("cache", perf_counter() - t0)
+        if len(scene["cached_frames"]) < n_frames:
+            workers = cls._resolve_workers(render_threads, n_frames)
+            cls._render_range(scene, 0, n_frames, frames.numpy(), masks.numpy(), mask_expansion, mask_feather, workers)
+        if cache_keys:
+            t0 = perf_counter()
+            for i, key in enumerate(cache_keys):
+                if i not in scene["cached_frames"]:
+                    _frame_cache.put(key, frames[i].numpy(), masks[i].numpy())
+            if profiler.enabled:
+                profiler.add("cache", perf_counter() - t0)
+            logging.info(f"[AE] Frame cache: reused {len(scene['cached_frames'])}, rendered {n_frames - len(scene['cached_frames'])}")
+        if draft > 1 or frame_step > 1:
+            frames, masks = cls._expand_draft(frames, masks, width, height, frame_step, end_frame - start_frame)
+        profiler.report(perf_counter() - t_start, layers)
+        return io.NodeOutput(frames, masks)
+
+
+def _scene_runtime(profiler: Optional[RenderProfiler] = None) -> Dict[str, Any]:
+    """Per-run mutable render state: panorama maps, static plates, cull counts, profiler."""
+    return {
+        "pano_maps": OrderedDict(), "pano_sources": {}, "pano_lock": threading.Lock(),
+        "plates": {},
+        "culled": {"invisible": 0, "occluded": 0}, "cull_lock": threading.Lock(),
+        "profiler": profiler or RenderProfiler(False),
+    }
 
 
 class AEAnimationExtension(ComfyExtension):
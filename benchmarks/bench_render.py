@@ -0,0 +1,285 @@
+"""
+End-to-end render benchmark for AE Animation.
+
+Generates synthetic ``layers_keyframes`` projects for every render path (plain 2D, 2D with 3D rotation,
+true 3D layers, camera-only and panorama), runs ``AEAnimation.execute`` headlessly and reports
+frames/sec, per-frame latency percentiles and peak RSS. Each case runs in a fresh process so peak RSS
+and caches are per case. Results are written as JSON for tracking regressions; pass ``--baseline``
+with an earlier results file to print speed ratios against it.
+
+Run from the ComfyUI Python environment (needs comfy_api importable):
+    python custom_nodes/ComfyUI-AE-Animation/benchmarks/bench_render.py --suite quick
+    python custom_nodes/ComfyUI-AE-Animation/benchmarks/bench_render.py --modes pano,3d --resolutions 1920x1080
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+from PIL import Image
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+MODES = ("2d", "rot3d", "3d", "camera", "pano")
+
+SUITES: Dict[str, Dict[str, Any]] = {
+    "quick": {"resolutions": ["640x360"], "layers": [4], "image_sizes": [256], "frames": [24]},
+    "full": {"resolutions": ["1280x720", "1920x1080"], "layers": [4, 16], "image_sizes": [256, 1024], "frames": [48]},
+}
+
+
+def _png(width: int, height: int, rng: np.random.Generator, alpha: bool = True, texture: str = "noise") -> str:
+    """
+    RGBA image as a data URL; foregrounds get an elliptical alpha with a soft edge. ``noise`` is the
+    worst case for caches and interpolation, ``smooth`` (random low-frequency gradients) looks like art.
+    """
+    if texture == "smooth":
+        yy, xx = np.mgrid[0:height, 0:width] / max(width, height)
+        phase = rng.uniform(0, 2 * np.pi, (4, 2))
+        freq = rng.uniform(1, 4, (4, 2))
+        img = np.stack([
+            127.5 + 127.5 * np.sin(freq[c, 0] * 2 * np.pi * xx + phase[c, 0]) * np.cos(freq[c, 1] * 2 * np.pi * yy + phase[c, 1])
+            for c in range(4)
+        ], axis=-1).astype(np.uint8)
+    else:
+        img = rng.integers(0, 256, (height, width, 4), dtype=np.uint8)
+    if alpha:
+        yy, xx = np.mgrid[0:height, 0:width]
+        r = ((xx - width / 2) / (width / 2.2)) ** 2 + ((yy - height / 2) / (height / 2.2)) ** 2
+        img[:, :, 3] = np.clip((1 - r) * 2000, 0, 255).astype(np.uint8)
+    else:
+        img[:, :, 3] = 255
+    buf = io.BytesIO()
+    Image.fromarray(img, "RGBA").save(buf, "PNG")
+    return "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode()
+
+
+def make_project(mode: str, n_layers: int, image_size: int, duration: float, seed: int = 0, texture: str = "noise") -> str:
+    """
+    Synthetic project JSON for one render path. Every foreground animates position, rotation and
+    opacity; one follows a bezier path and one carries a custom mask, so no frame is a hold frame.
+    """
+    rng = np.random.default_rng(seed)
+    bg_w, bg_h = (image_size * 4, image_size * 2) if mode == "pano" else (image_size * 2, image_size * 2 * 9 // 16)
+    layers: List[Dict[str, Any]] = [{
+        "type": "background",
+        "image_data": _png(bg_w, bg_h, rng, alpha=False, texture=texture),
+        "bg_mode": "fill",
+        "keyframes": {"scale": [{"time": 0, "value": 1.0}, {"time": duration, "value": 1.2}]},
+    }]
+    for i in range(n_layers):
+        size = int(image_size * rng.uniform(0.5, 1.0))
+        x, y = float(rng.uniform(-300, 300)), float(rng.uniform(-150, 150))
+        layer: Dict[str, Any] = {
+            "type": "foreground",
+            "image_data": _png(size, size, rng, texture=texture),
+            "x": x, "y": y, "z": float(rng.uniform(0, 200)),
+            "scale": float(rng.uniform(0.5, 1.2)),
+            "opacity": float(rng.uniform(0.6, 1.0)),
+            "keyframes": {
+                "x": [{"time": 0, "value": x}, {"time": duration, "value": -x}],
+                "rotation": [{"time": 0, "value": 0}, {"time": duration, "value": 90}],
+                "opacity": [{"time": 0, "value": 1.0}, {"time": duration, "value": 0.5}],
+            },
+        }
+        if mode == "rot3d":
+            layer["rotationX"], layer["rotationY"] = 10.0, 30.0
+            layer["keyframes"]["rotationY"] = [{"time": 0, "value": 0}, {"time": duration, "value": 60}]
+        elif mode == "3d":
+            layer["is3D"], layer["rotationY"] = True, 20.0
+            layer["keyframes"]["z"] = [{"time": 0, "value": 0}, {"time": duration, "value": -400}]
+        if i == 0:
+            layer["customMask"] = _png(64, 64, rng, texture=texture)
+        if i == 1:
+            layer["usePathAnimation"] = True
+            layer["bezierPath"] = [{"x": -300, "y": 0}, {"x": 0, "y": 120, "cp1x": -100, "cp1y": 200}, {"x": 300, "y": -100}]
+        layers.append(layer)
+
+    project: Dict[str, Any] = {}
+    if mode == "camera":
+        project["cam_enable"] = 1
+        project["project_keyframes"] = {
+            "cam_pos_x": [{"time": 0, "value": 0}, {"time": duration, "value": 150}],
+            "cam_yaw": [{"time": 0, "value": 0}, {"time": duration, "value": 15}],
+            "cam_pos_z": [{"time": 0, "value": 1000}, {"time": duration, "value": 700}],
+        }
+    elif mode == "pano":
+        project["pano_enable"] = 1
+        project["project_keyframes"] = {
+            "cam_yaw": [{"time": 0, "value": 0}, {"time": duration, "value": 120}],
+            "cam_fov": [{"time": 0, "value": 90}, {"time": duration, "value": 60}],
+        }
+    return json.dumps({"layers": layers, "project": project})
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process and its finished children (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    unit = 1 if sys.platform == "darwin" else 1024
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return peak * unit / (1024 * 1024)
+
+
+def _run_case(case: Dict[str, Any], repeat: int, queue: Any) -> None:
+    """Child-process body: time ``execute`` and every ``_render_frame`` call for one case."""
+    from ae_animation_core import AEAnimation
+
+    latencies: List[float] = []
+    render_frame = AEAnimation._render_frame.__func__
+
+    def timed_render_frame(cls, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return render_frame(cls, *args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - t0)
+
+    AEAnimation._render_frame = classmethod(timed_render_frame)
+
+    layers_keyframes = make_project(case["mode"], case["layers"], case["image_size"], case["frames"] / case["fps"], case["seed"])
+    walls = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        AEAnimation.execute(
+            width=case["width"], height=case["height"], fps=case["fps"], total_frames=case["frames"],
+            mask_expansion=case["mask_expansion"], mask_feather=case["mask_feather"],
+            layers_keyframes=layers_keyframes,
+            render_threads=case["threads"],
+        )
+        walls.append(time.perf_counter() - t0)
+
+    lat_ms = np.asarray(latencies) * 1000
+    wall = float(np.median(walls))
+    queue.put({
+        **case,
+        "wall_s": wall,
+        "wall_first_s": walls[0],
+        "fps_out": case["frames"] / wall,
+        "latency_ms": {
+            f"p{p}": float(np.percentile(lat_ms, p)) for p in (50, 90, 99)
+        } if lat_ms.size else None,
+        "frames_timed": int(lat_ms.size),
+        "peak_rss_mb": _peak_rss_mb(),
+    })
+
+
+def run_case(case: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    """Run one case in a fresh spawned process so peak RSS and caches do not leak between cases."""
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run_case, args=(case, repeat, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def _environment() -> Dict[str, Any]:
+    import cv2
+    import torch
+
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        rev = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_rev": rev,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "torch": torch.__version__,
+    }
+
+
+def _case_key(result: Dict[str, Any]) -> tuple:
+    keys = ("mode", "width", "height", "layers", "image_size", "frames", "threads")
+    return tuple(result[k] for k in keys)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suite", choices=sorted(SUITES), default="quick")
+    parser.add_argument("--modes", default=",".join(MODES), help="comma-separated subset of " + ",".join(MODES))
+    parser.add_argument("--resolutions", help="comma-separated WxH list (overrides the suite)")
+    parser.add_argument("--layers", help="comma-separated foreground layer counts (overrides the suite)")
+    parser.add_argument("--image-sizes", help="comma-separated foreground image sizes in px (overrides the suite)")
+    parser.add_argument("--frames", help="comma-separated frame counts (overrides the suite)")
+    parser.add_argument("--fps", type=int, default=24)
+    parser.add_argument("--threads", type=int, default=0, help="render_threads (0 = one per core)")
+    parser.add_argument("--mask-expansion", type=int, default=4)
+    parser.add_argument("--mask-feather", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3, help="execute() runs per case; the median wall time is reported")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_render.json", help="results file (JSON)")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    suite = SUITES[args.suite]
+
+    def pick(value: str, default: List[Any], cast) -> List[Any]:
+        return [cast(v) for v in value.split(",")] if value else default
+
+    resolutions = [tuple(int(v) for v in r.split("x")) for r in pick(args.resolutions, suite["resolutions"], str)]
+    modes = pick(args.modes, list(MODES), str)
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+
+    cases = [
+        {
+            "mode": mode, "width": w, "height": h, "layers": n_layers, "image_size": image_size, "frames": frames,
+            "fps": args.fps, "threads": args.threads,
+            "mask_expansion": args.mask_expansion, "mask_feather": args.mask_feather, "seed": args.seed,
+        }
+        for mode, (w, h), n_layers, image_size, frames in itertools.product(
+            modes, resolutions,
+            pick(args.layers, suite["layers"], int),
+            pick(args.image_sizes, suite["image_sizes"], int),
+            pick(args.frames, suite["frames"], int),
+        )
+    ]
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = {_case_key(r): r for r in json.load(f)["results"]}
+
+    print(f"{'mode':>6} {'output':>9} {'layers':>6} {'img':>5} {'frames':>6} {'fps':>8} {'p50 ms':>7} {'p90 ms':>7} "
+          f"{'p99 ms':>7} {'rss MB':>7}" + (f" {'vs base':>7}" if baseline else ""))
+    results = []
+    for case in cases:
+        result = run_case(case, args.repeat)
+        results.append(result)
+        lat = result["latency_ms"] or {"p50": float("nan"), "p90": float("nan"), "p99": float("nan")}
+        line = (f"{result['mode']:>6} {result['width']:>4}x{result['height']:<4} {result['layers']:>6} {result['image_size']:>5} "
+                f"{result['frames']:>6} {result['fps_out']:>8.1f} {lat['p50']:>7.2f} {lat['p90']:>7.2f} {lat['p99']:>7.2f} "
+                f"{result['peak_rss_mb']:>7.0f}")
+        base = baseline.get(_case_key(result))
+        if base:
+            line += f" {result['fps_out'] / base['fps_out']:>6.2f}x"
+        elif baseline:
+            line += f" {'-':>7}"
+        print(line, flush=True)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"environment": _environment(), "results": results}, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
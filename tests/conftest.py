@@ -0,0 +1,126 @@
+"""
+Shared fixtures for the render regression tests. They drive ``AEAnimation.execute`` headlessly, so
+they need the ComfyUI Python environment (``comfy_api`` importable) and are skipped without it:
+    python -m pytest custom_nodes/ComfyUI-AE-Animation/tests
+"""
+from __future__ import annotations
+
+import base64
+import io
+import json
+import os
+import sys
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+import pytest
+from PIL import Image
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+MODES = ("2d", "rot3d", "3d", "camera", "pano")
+
+# Small enough for a quick suite, large enough that every layer path lands partly on screen
+WIDTH, HEIGHT, FPS, FRAMES = 64, 48, 3, 3
+
+
+def _png(width: int, height: int, rng: np.random.Generator, alpha: bool = True) -> str:
+    """RGBA data URL of low-frequency gradients; foregrounds get a soft elliptical alpha."""
+    yy, xx = np.mgrid[0:height, 0:width] / max(width, height)
+    phase = rng.uniform(0, 2 * np.pi, (4, 2))
+    freq = rng.uniform(1, 3, (4, 2))
+    img = np.stack([
+        127.5 + 100 * np.sin(freq[c, 0] * 2 * np.pi * xx + phase[c, 0]) * np.cos(freq[c, 1] * 2 * np.pi * yy + phase[c, 1])
+        for c in range(4)
+    ], axis=-1).astype(np.uint8)
+    if alpha:
+        yy, xx = np.mgrid[0:height, 0:width]
+        r = ((xx - width / 2) / (width / 2)) ** 2 + ((yy - height / 2) / (height / 2)) ** 2
+        img[..., 3] = np.clip((1.2 - r) * 255 / 0.4, 0, 255).astype(np.uint8)
+    else:
+        img[..., 3] = 255
+    buf = io.BytesIO()
+    Image.fromarray(img, "RGBA").save(buf, "PNG")
+    return "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode()
+
+
+def make_project(mode: str, seed: int = 0, animated: bool = True) -> str:
+    """
+    Synthetic project JSON for one render path: a background plus three foregrounds that move,
+    rotate and fade (one on a bezier path, one with a custom mask). With ``animated`` False nothing
+    has keyframes, so every frame after the first is a hold frame.
+    """
+    rng = np.random.default_rng(seed)
+    duration = FRAMES / FPS
+    bg_w, bg_h = (128, 64) if mode == "pano" else (80, 56)
+    layers: List[Dict[str, Any]] = [{"type": "background", "image_data": _png(bg_w, bg_h, rng, alpha=False), "bg_mode": "fill"}]
+    if animated:
+        layers[0]["keyframes"] = {"scale": [{"time": 0, "value": 1.0}, {"time": duration, "value": 1.2}]}
+    for i in range(3):
+        size = int(rng.integers(24, 40))
+        x, y = float(rng.uniform(-30, 30)), float(rng.uniform(-15, 15))
+        layer: Dict[str, Any] = {
+            "type": "foreground",
+            "image_data": _png(size, size, rng),
+            "x": x, "y": y, "z": float(rng.uniform(0, 50)),
+            "scale": float(rng.uniform(0.6, 1.2)),
+            "opacity": float(rng.uniform(0.6, 1.0)),
+        }
+        if mode == "rot3d":
+            layer["rotationX"], layer["rotationY"] = 10.0, 30.0
+        elif mode == "3d":
+            layer["is3D"], layer["rotationY"] = True, 20.0
+        if animated:
+            layer["keyframes"] = {
+                "x": [{"time": 0, "value": x}, {"time": duration, "value": -x}],
+                "rotation": [{"time": 0, "value": 0}, {"time": duration, "value": 60}],
+                "opacity": [{"time": 0, "value": 1.0}, {"time": duration, "value": 0.5}],
+            }
+            if mode == "rot3d":
+                layer["keyframes"]["rotationY"] = [{"time": 0, "value": 0}, {"time": duration, "value": 60}]
+            elif mode == "3d":
+                layer["keyframes"]["z"] = [{"time": 0, "value": 0}, {"time": duration, "value": -200}]
+            if i == 1:
+                layer["usePathAnimation"] = True
+                layer["bezierPath"] = [{"x": -30, "y": 0}, {"x": 0, "y": 15, "cp1x": -10, "cp1y": 25}, {"x": 30, "y": -10}]
+        if i == 0:
+            layer["customMask"] = _png(16, 16, rng)
+        layers.append(layer)
+
+    project: Dict[str, Any] = {}
+    if mode == "camera":
+        project["cam_enable"] = 1
+        if animated:
+            project["project_keyframes"] = {
+                "cam_pos_x": [{"time": 0, "value": 0}, {"time": duration, "value": 20}],
+                "cam_yaw": [{"time": 0, "value": 0}, {"time": duration, "value": 10}],
+            }
+    elif mode == "pano":
+        project["pano_enable"] = 1
+        if animated:
+            project["project_keyframes"] = {
+                "cam_yaw": [{"time": 0, "value": 0}, {"time": duration, "value": 90}],
+                "cam_fov": [{"time": 0, "value": 90}, {"time": duration, "value": 70}],
+            }
+    return json.dumps({"layers": layers, "project": project})
+
+
+@pytest.fixture(scope="session")
+def ae():
+    """The node module; skips the tests outside a ComfyUI environment."""
+    pytest.importorskip("comfy_api")
+    import ae_animation_core
+    return ae_animation_core
+
+
+@pytest.fixture
+def render(ae) -> Callable[..., Tuple[np.ndarray, np.ndarray]]:
+    """Render a project with the test size and settings; returns uint8 ``(frames, masks)``."""
+    def run(project: str, **kwargs: Any) -> Tuple[np.ndarray, np.ndarray]:
+        params = dict(width=WIDTH, height=HEIGHT, fps=FPS, total_frames=FRAMES, mask_expansion=0, mask_feather=0)
+        params.update(kwargs)
+        frames, masks = ae.AEAnimation.execute(layers_keyframes=project, **params).args
+        # Outputs are exact multiples of 1/255
+        return np.rint(frames.numpy() * 255).astype(np.uint8), np.rint(masks.numpy() * 255).astype(np.uint8)
+    return run
@@ -0,0 +1,39 @@
+"""
+Regenerate ``data/legacy_reference.npz``, the output of the node as it was before the render
+optimizations, for ``test_legacy_output``. Pass the old module, e.g. from the baseline commit:
+    git show 21f8efd:ae_animation_core.py > /tmp/legacy_core.py
+    python tests/make_legacy_reference.py /tmp/legacy_core.py
+"""
+from __future__ import annotations
+
+import importlib.util
+import os
+import sys
+
+import numpy as np
+
+from conftest import FPS, FRAMES, HEIGHT, MODES, WIDTH, make_project
+
+REFERENCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "legacy_reference.npz")
+MASK_EXPANSION, MASK_FEATHER = 2, 3
+
+
+def main() -> None:
+    spec = importlib.util.spec_from_file_location("legacy_core", sys.argv[1])
+    legacy = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(legacy)
+    arrays = {}
+    for mode in MODES:
+        frames, masks = legacy.AEAnimation.execute(
+            width=WIDTH, height=HEIGHT, fps=FPS, total_frames=FRAMES, mask_expansion=MASK_EXPANSION,
+            mask_feather=MASK_FEATHER, layers_keyframes=make_project(mode),
+        ).args
+        arrays[f"{mode}_frames"] = np.rint(frames.numpy() * 255).astype(np.uint8)
+        arrays[f"{mode}_masks"] = np.rint(masks.numpy() * 255).astype(np.uint8)
+    os.makedirs(os.path.dirname(REFERENCE), exist_ok=True)
+    np.savez_compressed(REFERENCE, **arrays)
+    print(f"wrote {REFERENCE}")
+
+
+if __name__ == "__main__":
+    main()
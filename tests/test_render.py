@@ -0,0 +1,130 @@
+"""
+Render regression tests: output against the pre-optimization node, and the invariants the render
+paths promise (threads, tiles, hold frames and the frame cache do not change pixels).
+"""
+from __future__ import annotations
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from conftest import MODES, make_project
+
+REFERENCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "legacy_reference.npz")
+
+# README: default settings stay within 3/255 of the old output (Q15 compositing), panorama
+# backgrounds within about 8/255 (pre-reduced source); masks are unchanged
+LEGACY_TOLERANCE = {"pano": 8}
+LEGACY_TOLERANCE_DEFAULT = 3
+
+
+def _max_diff(a: np.ndarray, b: np.ndarray) -> int:
+    return int(np.abs(a.astype(np.int16) - b.astype(np.int16)).max())
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_legacy_output(render, mode):
+    reference = np.load(REFERENCE)
+    frames, masks = render(make_project(mode), mask_expansion=2, mask_feather=3)
+    assert _max_diff(frames, reference[f"{mode}_frames"]) <= LEGACY_TOLERANCE.get(mode, LEGACY_TOLERANCE_DEFAULT)
+    np.testing.assert_array_equal(masks, reference[f"{mode}_masks"])
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_threads_match_serial(render, mode):
+    project = make_project(mode)
+    serial = render(project, render_threads=1, mask_expansion=2, mask_feather=3)
+    threaded = render(project, render_threads=3, mask_expansion=2, mask_feather=3)
+    np.testing.assert_array_equal(threaded[0], serial[0])
+    np.testing.assert_array_equal(threaded[1], serial[1])
+
+
+@pytest.mark.parametrize("mode", ["2d", "pano"])
+@pytest.mark.parametrize("animated", [True, False])
+def test_tiles_match_full_frame(render, mode, animated):
+    # Paste and panorama paths are bit-identical when tiled; the static case goes through per-tile plates
+    project = make_project(mode, animated=animated)
+    full = render(project, mask_expansion=2, mask_feather=3)
+    tiled = render(project, render_tile_size=16, render_threads=2, mask_expansion=2, mask_feather=3)
+    np.testing.assert_array_equal(tiled[0], full[0])
+    np.testing.assert_array_equal(tiled[1], full[1])
+
+
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("tile_size", [0, 16])
+def test_hold_frames_match_rendered(ae, render, monkeypatch, mode, tile_size):
+    # Nothing animates, so only frame 0 is drawn and the rest reuse its pixels; each must equal rendering it alone
+    project = make_project(mode, animated=False)
+    drawn = []
+    resolve = ae.AEAnimation._resolve_frame.__func__
+
+    def spy(cls, scene, i):
+        drawn.append(i)
+        return resolve(cls, scene, i)
+
+    monkeypatch.setattr(ae.AEAnimation, "_resolve_frame", classmethod(spy))
+    frames, masks = render(project, render_threads=2, render_tile_size=tile_size)
+    # Only frame 0 is resolved (for its static plate and for drawing); frames 1.. are copies
+    assert set(drawn) == {0}
+    monkeypatch.undo()
+    for i in range(len(frames)):
+        alone = render(project, start_frame=i, end_frame=i + 1, render_tile_size=tile_size)
+        np.testing.assert_array_equal(frames[i], alone[0][0])
+        np.testing.assert_array_equal(masks[i], alone[1][0])
+
+
+@pytest.fixture
+def frame_cache_keys(ae, monkeypatch, tmp_path):
+    """Run with a private frame cache and record the per-frame keys each render computes."""
+    monkeypatch.setattr(ae, "_frame_cache", ae.FrameCache(str(tmp_path), 1 << 30))
+    calls = []
+    compute = ae.AEAnimation._frame_cache_keys.__func__
+
+    def spy(cls, *args):
+        keys = compute(cls, *args)
+        calls.append(keys)
+        return keys
+
+    monkeypatch.setattr(ae.AEAnimation, "_frame_cache_keys", classmethod(spy))
+    return calls
+
+
+def test_frame_cache_keys_follow_inputs(render, frame_cache_keys):
+    project = make_project("2d")
+    render(project, frame_cache=1)
+    render(project, frame_cache=1)
+    base = frame_cache_keys[-1]
+    assert frame_cache_keys[0] == base
+    assert len(set(base)) == len(base)
+
+    def keys_for(project: str, **kwargs):
+        render(project, frame_cache=1, **kwargs)
+        return frame_cache_keys[-1]
+
+    # Render settings change every key
+    for kwargs in ({"mask_expansion": 1}, {"mask_feather": 2}, {"width": 48}, {"layer_warp": "fused"}, {"mipmaps": 1}):
+        assert not set(keys_for(project, **kwargs)) & set(base), kwargs
+
+    # Image content changes every key
+    data = json.loads(project)
+    data["layers"][1]["image_data"] = json.loads(make_project("2d", seed=1))["layers"][1]["image_data"]
+    assert not set(keys_for(json.dumps(data))) & set(base)
+
+    # A keyframe change only affects the frames whose state it changes
+    data = json.loads(project)
+    data["layers"][1]["keyframes"]["opacity"][-1]["value"] = 0.25
+    keys = keys_for(json.dumps(data))
+    assert keys[0] == base[0]
+    assert all(a != b for a, b in zip(keys[1:], base[1:]))
+
+
+def test_frame_cache_reuse_matches_render(ae, render, frame_cache_keys):
+    project = make_project("camera")
+    fresh = render(project)
+    first = render(project, frame_cache=1)
+    reused = render(project, frame_cache=1)
+    for out in (first, reused):
+        np.testing.assert_array_equal(out[0], fresh[0])
+        np.testing.assert_array_equal(out[1], fresh[1])